@@ -1,86 +1,128 @@
 import pygame
+from typing import Callable
 
-from button import Button
+import fonts
+from button import Button, ButtonIndex
 from consts import *
+from text_cache import render_text
 
-WELCOME = TITLE_FONT.render('Welcome to Sudoku', True, BLACK)
-WELCOME_RECT = WELCOME.get_rect()
-WELCOME_RECT.center = (WIDTH/2, 100)
-
-WON = TITLE_FONT.render('You Won!', True, BLACK)
-WON_RECT = WON.get_rect()
-WON_RECT.center = (WIDTH/2, 100)
-
-DIFFICULTY_LABLE = HEADER_FONT.render('Select a Difficulty:', True, BLACK)
-DIFFICULTY_LABLE_RECT = DIFFICULTY_LABLE.get_rect()
-DIFFICULTY_LABLE_RECT.center = (WIDTH/2, HEIGHT/2 + 50)
-
-medium_rect = pygame.Rect((0, 0), BIG_BTN_SIZE)
-medium_rect.center = (WIDTH/2, HEIGHT/2 + 150)
-MEDIUM_BTN = Button(
-    rect=medium_rect,
-    text='MEDIUM',
-    bg_color=ORANGE,
-    text_color=WHITE,
-    font=BIG_BTN_FONT,
-)
-
-easy_rect = medium_rect.copy()
-easy_rect.x -= BIG_BTN_SIZE[0] + 5
-EASY_BTN = Button(
-    rect=easy_rect,
-    text='EASY',
-    bg_color=ORANGE,
-    text_color=WHITE,
-    font=BIG_BTN_FONT,
-)
-
-hard_rect = medium_rect.copy()
-hard_rect.x += BIG_BTN_SIZE[0] + 5
-HARD_BTN = Button(
-    rect=hard_rect,
-    text='HARD',
-    bg_color=ORANGE,
-    text_color=WHITE,
-    font=BIG_BTN_FONT,
-)
-
-middle_bottom = pygame.Rect((0, 0), SMALL_BTN_SIZE)
-middle_bottom.center = (WIDTH/2, HEIGHT + SMALL_BTN_SIZE[1]/2 + 5)
-RESTART_BTN = Button(
-    rect=middle_bottom,
-    text='RESTART',
-    bg_color=ORANGE,
-    text_color=WHITE,
-    font=SMALL_BTN_FONT,
-)
-
-reset_rect = middle_bottom.copy()
-reset_rect.x -= SMALL_BTN_SIZE[0] + 5
-RESET_BTN = Button(
-    rect=reset_rect,
-    text='RESET',
-    bg_color=ORANGE,
-    text_color=WHITE,
-    font=SMALL_BTN_FONT,
-)
-
-exit_rect = middle_bottom.copy()
-exit_rect.x += SMALL_BTN_SIZE[0] + 5
-EXIT_BTN = Button(
-    rect=exit_rect,
-    text='EXIT',
-    bg_color=ORANGE,
-    text_color=WHITE,
-    font=SMALL_BTN_FONT,
-)
-
-final_exit_rect = pygame.Rect((0, 0), BIG_BTN_SIZE)
-final_exit_rect.center = (WIDTH/2, HEIGHT/2)
-FINAL_EXIT_BTN = Button(
-    rect=final_exit_rect,
-    text='EXIT',
-    bg_color=ORANGE,
-    text_color=WHITE,
-    font=BIG_BTN_FONT,
-)
+"""
+The text and buttons of each screen are built the first time one of
+them is accessed, e.g. `assets.EASY_BTN` builds the whole start screen.
+"""
+
+_BUILDERS: dict[str, Callable[[], dict]] = {}
+
+
+def _screen(*names: str) -> Callable[[Callable[[], dict]], Callable[[], dict]]:
+    """Registers a builder returning the assets called `names`."""
+    def register(builder: Callable[[], dict]) -> Callable[[], dict]:
+        for name in names:
+            _BUILDERS[name] = builder
+        return builder
+    return register
+
+
+def __getattr__(name: str):
+    builder = _BUILDERS.get(name)
+    if builder is None:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+    built = builder()
+    globals().update(built)
+    return built[name]
+
+
+@_screen('WELCOME', 'WELCOME_RECT',
+         'DIFFICULTY_LABLE', 'DIFFICULTY_LABLE_RECT',
+         'EASY_BTN', 'MEDIUM_BTN', 'HARD_BTN', 'START_BUTTONS')
+def _start_screen() -> dict:
+    WELCOME = render_text(fonts.TITLE_FONT, 'Welcome to Sudoku', BLACK)
+    WELCOME_RECT = WELCOME.get_rect()
+    WELCOME_RECT.center = (WIDTH/2, 100)
+    DIFFICULTY_LABLE = render_text(fonts.HEADER_FONT, 'Select a Difficulty:', BLACK)
+    DIFFICULTY_LABLE_RECT = DIFFICULTY_LABLE.get_rect()
+    DIFFICULTY_LABLE_RECT.center = (WIDTH/2, HEIGHT/2 + 50)
+    medium_rect = pygame.Rect((0, 0), BIG_BTN_SIZE)
+    medium_rect.center = (WIDTH/2, HEIGHT/2 + 150)
+    MEDIUM_BTN = Button(
+        rect=medium_rect,
+        text='MEDIUM',
+        bg_color=ORANGE,
+        text_color=WHITE,
+        font=fonts.BIG_BTN_FONT,
+    )
+
+    easy_rect = medium_rect.copy()
+    easy_rect.x -= BIG_BTN_SIZE[0] + 5
+    EASY_BTN = Button(
+        rect=easy_rect,
+        text='EASY',
+        bg_color=ORANGE,
+        text_color=WHITE,
+        font=fonts.BIG_BTN_FONT,
+    )
+
+    hard_rect = medium_rect.copy()
+    hard_rect.x += BIG_BTN_SIZE[0] + 5
+    HARD_BTN = Button(
+        rect=hard_rect,
+        text='HARD',
+        bg_color=ORANGE,
+        text_color=WHITE,
+        font=fonts.BIG_BTN_FONT,
+    )
+    START_BUTTONS = ButtonIndex((EASY_BTN, MEDIUM_BTN, HARD_BTN))
+    return locals()
+
+
+@_screen('RESET_BTN', 'RESTART_BTN', 'EXIT_BTN', 'ACTIVE_BUTTONS')
+def _active_screen() -> dict:
+    middle_bottom = pygame.Rect((0, 0), SMALL_BTN_SIZE)
+    middle_bottom.center = (WIDTH/2, HEIGHT + SMALL_BTN_SIZE[1]/2 + 5)
+    RESTART_BTN = Button(
+        rect=middle_bottom,
+        text='RESTART',
+        bg_color=ORANGE,
+        text_color=WHITE,
+        font=fonts.SMALL_BTN_FONT,
+    )
+
+    reset_rect = middle_bottom.copy()
+    reset_rect.x -= SMALL_BTN_SIZE[0] + 5
+    RESET_BTN = Button(
+        rect=reset_rect,
+        text='RESET',
+        bg_color=ORANGE,
+        text_color=WHITE,
+        font=fonts.SMALL_BTN_FONT,
+    )
+
+    exit_rect = middle_bottom.copy()
+    exit_rect.x += SMALL_BTN_SIZE[0] + 5
+    EXIT_BTN = Button(
+        rect=exit_rect,
+        text='EXIT',
+        bg_color=ORANGE,
+        text_color=WHITE,
+        font=fonts.SMALL_BTN_FONT,
+    )
+    ACTIVE_BUTTONS = ButtonIndex((RESET_BTN, RESTART_BTN, EXIT_BTN))
+    return locals()
+
+
+@_screen('WON', 'WON_RECT', 'FINAL_EXIT_BTN', 'WON_BUTTONS')
+def _won_screen() -> dict:
+    WON = render_text(fonts.TITLE_FONT, 'You Won!', BLACK)
+    WON_RECT = WON.get_rect()
+    WON_RECT.center = (WIDTH/2, 100)
+    final_exit_rect = pygame.Rect((0, 0), BIG_BTN_SIZE)
+    final_exit_rect.center = (WIDTH/2, HEIGHT/2)
+    FINAL_EXIT_BTN = Button(
+        rect=final_exit_rect,
+        text='EXIT',
+        bg_color=ORANGE,
+        text_color=WHITE,
+        font=fonts.BIG_BTN_FONT,
+    )
+    WON_BUTTONS = ButtonIndex((FINAL_EXIT_BTN,))
+    return locals()
@@ -0,0 +1,356 @@
+import argparse
+import itertools
+import json
+import math
+import random
+import sys
+import time
+from typing import Callable, Optional
+
+import puzzle_format
+from board import Board
+from consts import WIDTH, HEIGHT, Difficulty
+from sudoku_generator import (
+    FillSearch,
+    SudokuGenerator,
+    generate_puzzle,
+    generate_sudoku,
+    solve,
+    solve_count,
+)
+from transforms import canonical
+from validator import np, validate_batch
+
+try:
+    import pygame
+except ImportError:  # pygame is only needed for the draw benchmarks
+    pygame = None
+
+
+SIZES = (4, 9, 16, 25)
+FILL_SIZES = (9, 16)  # sizes the fixed diagonal fill is benchmarked on
+BOARD_SIZES = (9, 16)  # sizes the `Board`/`BoardView` paths are benchmarked on
+CANONICAL_REMOVED = (0, 20)  # dense grids, the ones with the most tied lines
+THRESHOLD = 0.25  # allowed median slowdown against a baseline
+
+# Well-known hard 9x9 puzzles, one string per puzzle ('.' for empty).
+HARD_PUZZLES = (
+    # Arto Inkala (2012)
+    '8..........36......7..9.2...5...7.......457.....1...3...1....68..85...1..9....4..',
+    # AI Escargot
+    '1....7.9..3..2...8..96..5....53..9...1..8...26....4...3......1..4......7..7...3..',
+    # top95 #1
+    '4.....8.5.3..........7......2.....6.....8.4......1.......6.3.7.5..2.....1.4......',
+    # 17 clues, built to defeat naive backtracking
+    '..............3.85..1.2.......5.7.....4...1...9.......5......73..2.1........4...9',
+    '52...6.........7.13...........4..8..6......5...........418.........3..2...87.....',
+    '6.....8.3.4.7.................5.4.7.3..2.....1.6.......2.....5.....8.6......1....',
+)
+
+
+def percentile(samples: list[float], q: float) -> float:
+    """Returns the nearest-rank `q` percentile (0-100) of `samples`."""
+    ordered = sorted(samples)
+    idx = max(0, min(len(ordered) - 1, round(q / 100 * len(ordered)) - 1))
+    return ordered[idx]
+
+
+def time_runs(func: Callable[[], object], runs: int,
+              calls: int = 1) -> list[float]:
+    """Calls `func` `calls` times per run, `runs` times, and returns
+    each run's wall time per call (batching calls keeps very fast
+    functions above the timer's resolution).
+    """
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        for _ in range(calls):
+            func()
+        samples.append((time.perf_counter() - start) / calls)
+    return samples
+
+
+def seeded(runs: int) -> Callable[[], int]:
+    """Returns a function yielding the fixed seeds 0, 1, ... `runs - 1` in turn."""
+    return iter(range(runs)).__next__
+
+
+def bench_generation(size: int, runs: int) -> list[float]:
+    """Times `SudokuGenerator.fill_values_mrv` on empty boards of `size`."""
+    seed = seeded(runs)
+    def fill() -> None:
+        report = SudokuGenerator(size, seed=seed()).fill_values_mrv()
+        assert report.solved
+    return time_runs(fill, runs)
+
+
+def bench_remove(size: int, removed: int, runs: int) -> list[float]:
+    """Times `SudokuGenerator.remove_cells` on filled boards of `size`."""
+    samples = []
+    for seed in range(runs):
+        sudoku = SudokuGenerator(size, removed, seed)
+        sudoku.fill_values_mrv()
+        start = time.perf_counter()
+        sudoku.remove_cells()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def bench_generate_sudoku(size: int, removed: int, runs: int) -> list[float]:
+    """Times `generate_sudoku` end to end."""
+    seed = seeded(runs)
+    return time_runs(lambda: generate_sudoku(size, removed, seed=seed()), runs)
+
+
+def bench_is_solved(size: int, runs: int) -> list[float]:
+    """Times `Board.is_solved` on a board with one cell left."""
+    puzzle = solve([[0] * size for _ in range(size)])
+    puzzle[0][0] = 0
+    board = Board(size, puzzle=puzzle)
+    return time_runs(board.is_solved, runs, 10_000)
+
+
+def bench_click(size: int, runs: int) -> list[float]:
+    """Times `Board.click` on fixed pseudo-random points of the window."""
+    board = Board(size, puzzle=[[0] * size for _ in range(size)])
+    rng = random.Random(0)
+    points = [(rng.randrange(WIDTH), rng.randrange(HEIGHT)) for _ in range(1024)]
+    point = itertools.cycle(points).__next__
+    return time_runs(lambda: board.click(*point()), runs, 10_000)
+
+
+def bench_draw(size: int, runs: int, full: bool) -> list[float]:
+    """Times a `BoardView` frame drawn on an offscreen surface: the
+    whole board, or (`full=False`) the cells a move changed.
+    """
+    from board_view import BoardView
+    removed = size * size // 2
+    puzzle = generate_sudoku(size, removed, seed=0)
+    board = Board(size, puzzle=puzzle)
+    view = BoardView(board)
+    window = pygame.Surface((WIDTH, HEIGHT))
+    view.draw(window)
+    empty = [(i, j) for i in range(size) for j in range(size) if not puzzle[i][j]]
+    move = itertools.cycle(empty).__next__
+    def frame() -> None:
+        if not full:
+            board.select(*move())
+            board.set_current(1)
+        view.draw(window, full)
+    return time_runs(frame, runs)
+
+
+def fill_seeds(size: int, runs: int, max_steps: int = 200_000) -> list[int]:
+    """Returns the first `runs` seeds whose diagonal pre-fill of `size`
+    completes within `max_steps` placements, since a few 16x16 pre-fills
+    take minutes to complete (or refute) with either fill.
+    """
+    seeds = []
+    seed = 0
+    while len(seeds) < runs:
+        sudoku = SudokuGenerator(size, seed=seed)
+        sudoku.fill_diagonal()
+        if FillSearch(sudoku).run(max_steps) is not None:
+            seeds.append(seed)
+        seed += 1
+    return seeds
+
+
+def bench_fill(size: int, seeds: list[int], iterative: bool) -> list[float]:
+    """Times `fill_values` (recursive) or `fill_values_iterative`
+    (explicit stack) on the boards of `seeds`.
+    """
+    samples = []
+    for seed in seeds:
+        sudoku = SudokuGenerator(size, seed=seed)
+        fill = sudoku.fill_values_iterative if iterative else sudoku.fill_values
+        start = time.perf_counter()
+        fill()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def parse_puzzle(line: str) -> list[list[int]]:
+    """Parses a one-line puzzle ('.' or '0' for empty cells)."""
+    line = line.strip()
+    n = int(math.sqrt(len(line)))
+    vals = [0 if ch in '.0' else int(ch) for ch in line]
+    return [vals[i:i+n] for i in range(0, n * n, n)]
+
+
+def load_puzzles(path: str) -> list[list[list[int]]]:
+    """Reads the puzzles of a packed puzzle file, or of a text
+    file with one puzzle per line (skipping blank and `#` lines).
+    """
+    with open(path, 'rb') as file:
+        packed = file.read(len(puzzle_format.MAGIC)) == puzzle_format.MAGIC
+    if packed:
+        return [record[0] for record in puzzle_format.read_puzzles(path)]
+    with open(path) as file:
+        return [parse_puzzle(line) for line in file
+                if line.strip() and not line.startswith('#')]
+
+
+def bench_solver(puzzles: list[list[list[int]]], runs: int) -> list[float]:
+    """Times solving and uniqueness-checking each puzzle `runs` times,
+    in the single search of `solve_count`.
+    """
+    def solve_all() -> None:
+        for grid in puzzles:
+            solution, count = solve_count(grid)
+            assert solution is not None and count == 1
+    return [t / len(puzzles) for t in time_runs(solve_all, runs)]
+
+
+def bench_canonical(size: int, removed: int, runs: int) -> list[float]:
+    """Times `transforms.canonical` on puzzles of `size` missing `removed` cells."""
+    puzzles = [generate_puzzle(size, removed, seed=seed)[0] for seed in range(runs)]
+    samples = []
+    for puzzle in puzzles:
+        start = time.perf_counter()
+        canonical(puzzle)
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def bench_validation(size: int, count: int, runs: int) -> list[float]:
+    """Times `validate_batch` on `count` boards (half of them corrupted)."""
+    solution = solve([[0] * size for _ in range(size)])
+    grids = np.array([solution] * count)
+    grids[::2, 0, 0] = grids[::2, 0, 1]
+    def check() -> None:
+        assert validate_batch(grids).sum() == count // 2
+    return [t / count for t in time_runs(check, runs)]
+
+
+def summarize(samples: list[float]) -> dict[str, float]:
+    """Returns the min, median and p99 of `samples`."""
+    return {
+        'min': min(samples),
+        'median': percentile(samples, 50),
+        'p99': percentile(samples, 99),
+    }
+
+
+def report(name: str, samples: list[float],
+           results: Optional[dict[str, dict[str, float]]] = None) -> None:
+    """Prints the summary of `samples`, also storing it in `results[name]`."""
+    stats = summarize(samples)
+    if results is not None:
+        results[name] = stats
+    print(f'{name:<32} min {stats["min"]*1000:9.4f} ms'
+          f'   p50 {stats["median"]*1000:9.4f} ms'
+          f'   p99 {stats["p99"]*1000:9.4f} ms'
+          f'   ({len(samples)} runs)')
+
+
+def regressions(results: dict[str, dict[str, float]],
+                baseline: dict[str, dict[str, float]],
+                threshold: float) -> list[str]:
+    """Returns a line for every case whose median is more than
+    `threshold` (a fraction) slower than in `baseline`.
+    Cases missing from either side are skipped.
+    """
+    lines = []
+    for name, stats in results.items():
+        if name not in baseline:
+            continue
+        before, after = baseline[name]['median'], stats['median']
+        if after > before * (1 + threshold):
+            lines.append(f'{name}: median {before*1000:.4f} ms -> '
+                         f'{after*1000:.4f} ms (+{(after/before - 1)*100:.0f}%)')
+    return lines
+
+
+def removed_cells(size: int, difficulty: Difficulty) -> int:
+    """Scales the cells a `difficulty` clears on 9x9 to a board of `size`."""
+    return round(difficulty.value * size * size / 81)
+
+
+def run_suite(args: argparse.Namespace) -> dict[str, dict[str, float]]:
+    """Runs every benchmark, printing each case as it finishes.
+    Returns the summaries by case name.
+    """
+    results: dict[str, dict[str, float]] = {}
+    for size in args.sizes:
+        report(f'generate {size}x{size}', bench_generation(size, args.runs), results)
+    for size in FILL_SIZES:
+        seeds = fill_seeds(size, args.runs)
+        report(f'fill {size}x{size} recursive', bench_fill(size, seeds, False), results)
+        report(f'fill {size}x{size} stack', bench_fill(size, seeds, True), results)
+    for size in BOARD_SIZES:
+        for difficulty in Difficulty:
+            removed = removed_cells(size, difficulty)
+            name = f'{size}x{size} {difficulty.name.lower()}'
+            report(f'remove_cells {name}', bench_remove(size, removed, args.runs), results)
+            report(f'generate_sudoku {name}',
+                   bench_generate_sudoku(size, removed, args.runs), results)
+        report(f'Board.is_solved {size}x{size}', bench_is_solved(size, args.runs), results)
+        report(f'Board.click {size}x{size}', bench_click(size, args.runs), results)
+        if pygame is None:
+            print('pygame not installed, skipping draw benchmarks')
+        else:
+            report(f'BoardView.draw {size}x{size} full',
+                   bench_draw(size, args.runs, True), results)
+            report(f'BoardView.draw {size}x{size} move',
+                   bench_draw(size, args.runs, False), results)
+    puzzles = load_puzzles(args.puzzles) if args.puzzles\
+        else [parse_puzzle(line) for line in HARD_PUZZLES]
+    samples = bench_solver(puzzles, args.runs)
+    report('solve + count (per puzzle)', samples, results)
+    print(f'{"solver throughput":<32} {1/percentile(samples, 50):9.0f} puzzles/s')
+    for size in BOARD_SIZES:
+        for removed in CANONICAL_REMOVED:
+            report(f'canonical {size}x{size} {removed} removed',
+                   bench_canonical(size, removed, args.runs), results)
+    if np is None:
+        print('numpy not installed, skipping batch validation')
+        return results
+    for size in args.sizes:
+        samples = bench_validation(size, 100_000, max(1, args.runs // 10))
+        report(f'validate {size}x{size} (per board)', samples, results)
+        print(f'{"validation throughput":<32} {1/percentile(samples, 50):9.0f} boards/s')
+    return results
+
+
+def main() -> None:
+    """Runs the suite; with `--baseline FILE`, exits with status 1 if a
+    case's median is more than `--threshold` slower than in FILE
+    (as written by `--save-baseline`).
+    """
+    parser = argparse.ArgumentParser(description='Sudoku performance benchmarks.')
+    parser.add_argument('--runs', type=int, default=100,
+                        help='number of timed runs per case')
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES,
+                        help='board sizes to generate')
+    parser.add_argument('--puzzles', metavar='FILE',
+                        help='packed or one-line-per-puzzle file to solve '
+                             '(defaults to a built-in hard set)')
+    parser.add_argument('--save-baseline', metavar='FILE',
+                        help='write the results to FILE as JSON')
+    parser.add_argument('--baseline', metavar='FILE',
+                        help='compare the results against a saved baseline')
+    parser.add_argument('--threshold', type=float, default=THRESHOLD,
+                        help='allowed median slowdown against the baseline, '
+                             f'as a fraction (default {THRESHOLD})')
+    args = parser.parse_args()
+    if pygame is not None:
+        pygame.font.init()
+    results = run_suite(args)
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as file:
+            json.dump(results, file, indent=2)
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        slower = regressions(results, baseline, args.threshold)
+        for line in slower:
+            print(f'REGRESSION {line}')
+        if slower:
+            sys.exit(1)
+        print(f'no regressions beyond {args.threshold:.0%} '
+              f'against {args.baseline}')
+
+
+if __name__ == '__main__':
+    main()
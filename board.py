@@ -1,13 +1,8 @@
+import functools
 import math
-import pygame
-from typing import Optional, Iterable, Iterator, TypeVar
-
-from consts import (
-    WIDTH, HEIGHT,
-    LINE_THICKNESS,
-    BLACK,
-)
-from cell import Cell
+from typing import Callable, Optional, Iterable, Iterator, TypeVar
+
+from consts import WIDTH, HEIGHT
 from sudoku_generator import generate_sudoku
 
 _T = TypeVar('_T')
@@ -19,45 +14,148 @@ def flatten(__data: Iterable[Iterable[_T]]) -> Iterator[_T]:
             yield val
 
 
+def iter_bits(__mask: int) -> Iterator[int]:
+    """Yields the positions of the set bits of `__mask`, lowest first."""
+    while __mask:
+        bit = __mask & -__mask
+        __mask ^= bit
+        yield bit.bit_length() - 1
+
+
+@functools.lru_cache
+def _layout(n: int) -> tuple[tuple[tuple[int, int, int], ...], tuple[int, ...]]:
+    """Returns, for every cell of an n by n board (as flat indices):
+    - the offsets of its row, column and box counts in `Board.counts`
+    - the bitset of the cells sharing its row, column or box (itself included)
+    """
+    k = int(math.sqrt(n))
+    stride = n + 1
+    offsets = []
+    units = []
+    for i in range(n):
+        for j in range(n):
+            box = i // k * k + j // k
+            offsets.append((i * stride, (n + j) * stride, (2*n + box) * stride))
+            mask = 0
+            for a in range(n):
+                mask |= 1 << (i*n + a) | 1 << (a*n + j)
+            for a in range(i - i%k, i - i%k + k):
+                for b in range(j - j%k, j - j%k + k):
+                    mask |= 1 << (a*n + b)
+            units.append(mask)
+    return tuple(offsets), tuple(units)
+
+
 class Board:
-    def __init__(self, size: int = 9, removed: int = 0) -> None:
+    __slots__ = ('size', 'box_length', 'values', 'initial', 'givens',
+                 'selected', 'changed', 'counts', 'empty', 'conflicts',
+                 'initial_counts', 'listeners')
+
+    def __init__(self, size: int = 9, removed: int = 0,
+                 puzzle: Optional[list[list[int]]] = None) -> None:
         """Constructor for the Board class.
-        screen is a window from PyGame.
+        Plays `puzzle` if given, otherwise generates a new one.
+        The board holds no pygame state, see `BoardView` for drawing it.
+
+        The board is stored compactly, for servers holding many of them:
+        - `self.values`   - the values, row-major in a flat `bytearray`
+        - `self.initial`  - the values of the puzzle, as `bytes`
+        - `self.givens`   - bitset of the cells given by the puzzle
+        - `self.selected` - flat index of the selected cell (-1 for none)
+        - `self.changed`  - bitset of the cells changed since a view last
+        drained it (see `set_board`)
         """
         assert math.sqrt(size).is_integer()
-        data = generate_sudoku(size, removed)
-        self.data = data
-        self.initial_state = [row.copy() for row in data]
-        self.set_board(data)
-        self.selection = None
-    
+        grid = generate_sudoku(size, removed) if puzzle is None else puzzle
+        n = len(grid)
+        self.size = n
+        self.box_length = int(math.sqrt(n))
+        self.values = bytearray(flatten(grid))
+        self.initial = bytes(self.values)
+        self.givens = sum(1 << i for i, val in enumerate(self.initial) if val)
+        self.selected = -1
+        self.listeners: list[Callable[[int, int, int, int], None]] = []
+        self.set_board(grid)
+        self.initial_counts = (bytes(self.counts), self.empty, self.conflicts)
+
+    @property
+    def data(self) -> list[list[int]]:
+        """Returns a copy of the values as rows."""
+        n = self.size
+        return [list(self.values[i:i+n]) for i in range(0, n * n, n)]
+
+    @property
+    def selection(self) -> Optional[tuple[int, int]]:
+        """The (row, col) of the selected cell, or `None`."""
+        return None if self.selected < 0 else divmod(self.selected, self.size)
+
+    def value(self, row: int, col: int) -> int:
+        return self.values[row * self.size + col]
+
     def set_board(self, __data: list[list[int]]) -> None:
-        rows = len(__data)
-        cols = len(__data[0])
-        self.data = __data
-        self.cells = [[Cell(val, (i, j), (rows, cols), not val)
-                       for j, val in enumerate(row)]
-                       for i, row in enumerate(__data)]
-
-    def draw(self, window: pygame.Surface) -> None:
-        """Draws an outline of the Sudoku grid,
-        with bold lines to delineate the 3x3 boxes.
-        Draws every cell on this board.
+        """Replaces the values of the board with those of `__data`.
+        `self.changed` collects (as a bitset of flat indices) every cell
+        whose value, selection or conflict state may have changed since
+        a view last drained it, starting with every cell.
+        Every listener is called as `listener(row, col, old, new)` for
+        each value that differs from the previous board.
+        """
+        self.load_values(bytes(flatten(__data)))
+
+    def load_values(self, values: bytes) -> None:
+        """Replaces the values of the board with the flat, row-major `values`
+        (e.g. a snapshot of `self.values`), like `set_board`.
+        """
+        previous = bytes(self.values)
+        self.values[:] = values
+        self.count_values()
+        self.changed_all(previous)
+
+    def changed_all(self, previous: bytes) -> None:
+        """Marks every cell changed and notifies the listeners of the
+        values that differ from `previous`.
+        """
+        n = self.size
+        self.changed = (1 << (n * n)) - 1
+        if not self.listeners:
+            return
+        for i, (old, new) in enumerate(zip(previous, self.values)):
+            if old != new:
+                for listener in self.listeners:
+                    listener(i // n, i % n, old, new)
+
+    def count_values(self) -> None:
+        """Rebuilds the running counts behind `is_solved` and `is_conflicting`:
+        - `self.empty`     - the number of empty cells
+        - `self.counts`    - how often each digit appears in each unit:
+        entry `unit * (n+1) + digit`, with the rows, then the columns,
+        then the boxes as units
+        - `self.conflicts` - the number of repeated digits over all
+        rows, columns and boxes (a digit appearing c times counts c - 1)
         """
-        for row in self.cells:
-            for cell in row:
-                cell.draw(window)
-        rows, cols = len(self.data), len(self.data[0])
-        row_boxes, col_boxes = int(math.sqrt(rows)), int(math.sqrt(cols))
-        width, height = WIDTH/cols, HEIGHT/rows
-        for i in range(row_boxes+1):
-            y = i * row_boxes * height
-            rect = pygame.Rect(0, y-LINE_THICKNESS, WIDTH, LINE_THICKNESS*2)
-            pygame.draw.rect(window, BLACK, rect)
-        for j in range(col_boxes+1):
-            x = j * col_boxes * width
-            rect = pygame.Rect(x-LINE_THICKNESS, 0, LINE_THICKNESS*2, HEIGHT)
-            pygame.draw.rect(window, BLACK, rect)
+        n = self.size
+        self.counts = bytearray(3 * n * (n+1))
+        self.empty = 0
+        self.conflicts = 0
+        for i, val in enumerate(self.values):
+            if val:
+                self._count(i, val)
+            else:
+                self.empty += 1
+
+    def _count(self, idx: int, val: int) -> None:
+        counts = self.counts
+        for offset in _layout(self.size)[0][idx]:
+            if counts[offset + val]:
+                self.conflicts += 1
+            counts[offset + val] += 1
+
+    def _uncount(self, idx: int, val: int) -> None:
+        counts = self.counts
+        for offset in _layout(self.size)[0][idx]:
+            counts[offset + val] -= 1
+            if counts[offset + val]:
+                self.conflicts -= 1
 
     # def selected_cell(self) -> Cell:
     #     assert self.selection is not None
@@ -66,11 +164,10 @@ class Board:
     
     def clear_selection(self) -> None:
         """Sets the selection back to `None`."""
-        if self.selection is None:
+        if self.selected < 0:
             return
-        row, col = self.selection
-        self.cells[row][col].selected = False
-        self.selection = None
+        self.changed |= 1 << self.selected
+        self.selected = -1
     
     def select(self, row: int, col: int) -> None:
         """Marks the cell at (row, col) in the
@@ -78,26 +175,29 @@ class Board:
         Once a cell has been selected, the user
         can edit its value or sketched value.
         """
-        if self.selection is not None:
-            old_row, old_col = self.selection
-            self.cells[old_row][old_col].selected = False
-        new_cell = self.cells[row][col]
-        if new_cell.editable:
-            # print(f'Editing {new_cell}')
-            self.selection = (row, col)
-            new_cell.selected = True
-        else:
-            # print(f'Failed to edit {new_cell}')
-            self.selection = None
+        self.clear_selection()
+        if self.is_editable(row, col):
+            self.selected = row * self.size + col
+            self.changed |= 1 << self.selected
+
+    def is_editable(self, row: int, col: int) -> bool:
+        """Returns whether (row, col) was empty in the original puzzle."""
+        return not self.givens >> (row * self.size + col) & 1
 
     def click(self, x: int, y: int) -> Optional[tuple[int, int]]:
         """If a tuple of (x, y) coordinates is within
         the displayed board, this function returns a tuple
         of the (row, col) of the cell which was clicked.
         Otherwise, this function returns `None`.
+        The cell is found arithmetically from the same
+        `WIDTH/cols` by `HEIGHT/rows` geometry the cells use.
         """
-        return next((cell.pos for cell in flatten(self.cells)
-                     if cell.outer.collidepoint(x, y)), None)
+        n = self.size
+        if not (0 <= x < WIDTH and 0 <= y < HEIGHT):
+            return None
+        width, height = WIDTH/n, HEIGHT/n
+        return (min(int(y // height), n - 1),
+                min(int(x // width), n - 1))
 
     # def clear(self) -> None:
     #     """Clears the value cell. Note that the user can only
@@ -115,47 +215,82 @@ class Board:
         to user entered value.
         Called when the user presses the Enter key.
         """
-        if self.selection is None:
+        if self.selected < 0:
             return
-        row, col = self.selection
-        self.data[row][col] = __value
-        self.cells[row][col].set_(__value)
+        self.set_value(*divmod(self.selected, self.size), __value)
+
+    def set_value(self, row: int, col: int, __value: int) -> None:
+        """Sets the value at (row, col), selected or not, keeping the
+        counts, `self.changed` and the listeners up to date.
+        """
+        if not 0 <= __value <= self.size:
+            return
+        idx = row * self.size + col
+        old = self.values[idx]
+        if old:
+            self._uncount(idx, old)
+        else:
+            self.empty -= 1
+        if __value:
+            self._count(idx, __value)
+        else:
+            self.empty += 1
+        self.values[idx] = __value
+        self.mark_unit_changed(row, col)
+        for listener in self.listeners:
+            listener(row, col, old, __value)
+
+    def mark_unit_changed(self, row: int, col: int) -> None:
+        """Adds every cell sharing a row, column or box with (row, col)
+        to `self.changed`, since their conflict state may have changed.
+        """
+        self.changed |= _layout(self.size)[1][row * self.size + col]
 
     def reset_to_original(self) -> None:
         """Reset all cells in the board to their original values
         (0 if cleared, otherwise the corresponding digit).
+        The values and counts are restored with one buffer copy each.
         """
-        self.set_board(self.initial_state)
+        previous = bytes(self.values) if self.listeners else b''
+        counts, self.empty, self.conflicts = self.initial_counts
+        self.values[:] = self.initial
+        self.counts[:] = counts
+        self.changed_all(previous)
 
     def is_full(self) -> bool:
         """Returns a Boolean value indicating whether
         the board is full or not.
         """
-        return 0 not in flatten(self.data)
+        return not self.empty
 
     def find_empty(self) -> Optional[tuple[int, int]]:
         """Finds an empty cell and returns its (`row`, `col`).
         Returns `None` if the board is empty.
         """
-        return next(((i, j) for i, row in enumerate(self.data)
-                            for j, val in enumerate(row) if not val), None)
+        idx = self.values.find(0)
+        return None if idx < 0 else divmod(idx, self.size)
+
+    def is_conflicting(self, row: int, col: int) -> bool:
+        """Returns whether the value at (row, col) is repeated
+        in the cell's row, column or box.
+        """
+        idx = row * self.size + col
+        val = self.values[idx]
+        return bool(val) and any(self.counts[offset + val] > 1
+                                 for offset in _layout(self.size)[0][idx])
+
+    def candidates(self, row: int, col: int) -> int:
+        """Returns the digits not yet used in the row, column or
+        box of (row, col) as a mask (bit `d - 1` for digit d).
+        """
+        counts = self.counts
+        a, b, c = _layout(self.size)[0][row * self.size + col]
+        mask = 0
+        for d in range(1, self.size + 1):
+            if not (counts[a + d] or counts[b + d] or counts[c + d]):
+                mask |= 1 << (d - 1)
+        return mask
 
     def is_solved(self) -> bool:
         """Returns whether the Sudoku board is solved correctly."""
-        def box_works(row_start: int, col_start: int) -> bool:
-            box = (row[col_start:col_start+n] for row
-                   in self.data[row_start:row_start+n])
-            return len(set(flatten(box))) == 9
-        
-        if not self.is_full():
-            return False
-        
-        n = int(math.sqrt(len(self.data)))
-        rows = len(self.data)
-        cols = len(self.data[0])
-
-        rows_work = all(len(set(row)) == cols for row in self.data)
-        cols_work = all(len(set(col)) == rows for col in zip(*self.data))
-        boxes_work = all(box_works(i, j) for i in range(0, rows, n)
-                                         for j in range(0, cols, n))
-        return rows_work and cols_work and boxes_work
+        return not self.empty and not self.conflicts
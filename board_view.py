@@ -0,0 +1,84 @@
+import math
+import pygame
+from typing import Iterable, Optional
+
+from consts import (
+    WIDTH, HEIGHT,
+    LINE_THICKNESS,
+    BLACK,
+)
+from board import Board, flatten, iter_bits
+from cell import Cell
+
+
+class BoardView:
+    def __init__(self, board: Board) -> None:
+        """Renders a `Board` with one `Cell` per square.
+        The view pulls changes from `board.changed` when drawn,
+        so the board itself never touches pygame.
+        """
+        self.board = board
+        rows = cols = board.size
+        self.cells = [[Cell(val, (i, j), (rows, cols), board.is_editable(i, j))
+                       for j, val in enumerate(row)]
+                       for i, row in enumerate(board.data)]
+        self.grid = None
+        self.sync((i, j) for i in range(rows) for j in range(cols))
+
+    def sync(self, positions: Optional[Iterable[tuple[int, int]]] = None) -> None:
+        """Copies the value, selection and conflict state of the board
+        cells at `positions` (default: the board's changed cells)
+        into their `Cell`s, which mark themselves dirty if anything changed.
+        """
+        board = self.board
+        n = board.size
+        if positions is None:
+            changed, board.changed = board.changed, 0
+            positions = (divmod(idx, n) for idx in iter_bits(changed))
+        for i, j in positions:
+            cell = self.cells[i][j]
+            cell.set_(board.values[i*n + j])
+            cell.selected = board.selected == i*n + j
+            cell.conflicting = board.is_conflicting(i, j)
+
+    def grid_surface(self) -> pygame.Surface:
+        """Returns the bold lines delineating the boxes, drawn once
+        on a transparent board-sized surface and cached.
+        """
+        if self.grid is not None:
+            return self.grid
+        self.grid = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
+        rows, cols = len(self.cells), len(self.cells[0])
+        row_boxes, col_boxes = int(math.sqrt(rows)), int(math.sqrt(cols))
+        width, height = WIDTH/cols, HEIGHT/rows
+        for i in range(row_boxes+1):
+            y = i * row_boxes * height
+            rect = pygame.Rect(0, y-LINE_THICKNESS, WIDTH, LINE_THICKNESS*2)
+            pygame.draw.rect(self.grid, BLACK, rect)
+        for j in range(col_boxes+1):
+            x = j * col_boxes * width
+            rect = pygame.Rect(x-LINE_THICKNESS, 0, LINE_THICKNESS*2, HEIGHT)
+            pygame.draw.rect(self.grid, BLACK, rect)
+        return self.grid
+
+    def draw(self, window: pygame.Surface, full: bool = True) -> list[pygame.Rect]:
+        """Draws an outline of the Sudoku grid,
+        with bold lines to delineate the 3x3 boxes.
+        Draws every cell on this board, or with `full=False` only
+        the cells that changed since they were last drawn.
+        Returns the rects of `window` that were drawn on.
+        """
+        self.sync()
+        grid = self.grid_surface()
+        if full:
+            for cell in flatten(self.cells):
+                cell.draw(window)
+            window.blit(grid, (0, 0))
+            return [grid.get_rect()]
+        rects = []
+        for cell in flatten(self.cells):
+            if cell.dirty:
+                cell.draw(window)
+                window.blit(grid, cell.outer, cell.outer)
+                rects.append(cell.outer)
+        return rects
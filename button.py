@@ -1,4 +1,7 @@
 import pygame
+from typing import Iterable, Optional
+
+from text_cache import render_text
 
 
 class Button:
@@ -16,16 +19,50 @@ class Button:
         self.text = text
         self.text_color = text_color
         self.font = font
-    
-    def draw(self, window: pygame.Surface) -> None:
-        text = self.font.render(self.text, True,
-                                self.text_color,
-                                self.bg_color)
+        self.dirty = True
+
+    def set_text(self, __text: str) -> None:
+        if __text != self.text:
+            self.text = __text
+            self.dirty = True
+
+    def draw(self, window: pygame.Surface) -> pygame.Rect:
+        """Draws the button, marks it clean and returns its rect."""
+        self.dirty = False
+        text = render_text(self.font, self.text,
+                           self.text_color,
+                           self.bg_color)
         text_rect = text.get_rect()
         text_rect.center = self.rect.center
 
         pygame.draw.rect(window, self.bg_color, self.rect)
         window.blit(text, text_rect)
+        return self.rect
     
     def click(self, x: float, y: float) -> bool:
         return self.rect.collidepoint(x, y)
+
+
+class ButtonIndex:
+    def __init__(self, buttons: Iterable[Button], bucket_size: int = 64) -> None:
+        """A uniform-grid spatial index over a set of buttons.
+        Each button is registered in every `bucket_size` square
+        its rect overlaps, so a hit test only looks at one bucket.
+        """
+        self.bucket_size = bucket_size
+        self.buckets: dict[tuple[int, int], list[Button]] = {}
+        for button in buttons:
+            self.add(button)
+
+    def add(self, button: Button) -> None:
+        size = self.bucket_size
+        rect = button.rect
+        for i in range(rect.left // size, (rect.right - 1) // size + 1):
+            for j in range(rect.top // size, (rect.bottom - 1) // size + 1):
+                self.buckets.setdefault((i, j), []).append(button)
+
+    def hit(self, x: float, y: float) -> Optional[Button]:
+        """Returns the button under (x, y), or `None`."""
+        bucket = self.buckets.get((int(x // self.bucket_size),
+                                   int(y // self.bucket_size)), ())
+        return next((button for button in bucket if button.click(x, y)), None)
@@ -3,13 +3,17 @@ import pygame
 from consts import (
     WIDTH, HEIGHT,
     WHITE, BLACK, RED,
-    LIGHT_GRAY, DARK_GRAY,
+    LIGHT_GRAY, DARK_GRAY, LIGHT_RED,
     LINE_THICKNESS,
-    NUMBER_FONT,
 )
+import fonts
+from text_cache import render_text
 
 
 class Cell:
+    __slots__ = ('value', 'pos', 'string', 'outer', '_selected',
+                 '_conflicting', 'editable', 'dirty')
+
     def __init__(self, value: int, pos: tuple[int, int],
                  dims: tuple[int, int], editable: bool = True) -> None:
         row, col = pos
@@ -19,20 +23,45 @@ class Cell:
         self.pos = pos
         self.string = str(value) if value else ''
         self.outer = pygame.Rect(width*col, height*row, width, height)
-        self.inner = pygame.Rect(width*col + LINE_THICKNESS,
-                                 height*row + LINE_THICKNESS,
-                                 width - 2*LINE_THICKNESS,
-                                 height - 2*LINE_THICKNESS)
-        self.selected = False
+        self._selected = False
+        self._conflicting = False
         self.editable = editable
+        self.dirty = True
     
     def __repr__(self) -> str:
         """Cannot be used to recreate the `Cell` instance (just for debugging)."""
         return f'Cell(value={self.value}, pos={self.pos}, editable={self.editable})'
     
+    @property
+    def inner(self) -> pygame.Rect:
+        """The cell's area inside its border, computed when drawn."""
+        return self.outer.inflate(-2*LINE_THICKNESS, -2*LINE_THICKNESS)
+
+    @property
+    def selected(self) -> bool:
+        return self._selected
+
+    @selected.setter
+    def selected(self, __value: bool) -> None:
+        if __value != self._selected:
+            self._selected = __value
+            self.dirty = True
+
+    @property
+    def conflicting(self) -> bool:
+        return self._conflicting
+
+    @conflicting.setter
+    def conflicting(self, __value: bool) -> None:
+        if __value != self._conflicting:
+            self._conflicting = __value
+            self.dirty = True
+
     def set_(self, __value: int) -> bool:
         if not self.editable:
             return False
+        if __value != self.value:
+            self.dirty = True
         self.value = __value
         self.string = str(__value) if __value else ''
         return True
@@ -42,13 +71,17 @@ class Cell:
     #     self.string = ''
     
     def draw(self, window: pygame.Surface) -> None:
+        """Draws the cell and marks it clean."""
+        self.dirty = False
         border_color = RED if self.selected else LIGHT_GRAY
+        bg_color = LIGHT_RED if self.conflicting else WHITE
+        inner = self.inner
         pygame.draw.rect(window, border_color, self.outer)
-        pygame.draw.rect(window, WHITE, self.inner)
+        pygame.draw.rect(window, bg_color, inner)
 
         text_color = RED if self.selected else\
             (DARK_GRAY if self.editable else BLACK)
-        text = NUMBER_FONT.render(self.string, True, text_color, WHITE)
+        text = render_text(fonts.NUMBER_FONT, self.string, text_color, bg_color)
         text_rect = text.get_rect()
-        text_rect.center = self.inner.center
+        text_rect.center = inner.center
         window.blit(text, text_rect)
@@ -1,23 +1,12 @@
 from enum import Enum, auto
-import pygame
-import os
-
-pygame.font.init()
-
-ARIAL_PATH = os.path.join('fonts', 'arial.ttf')
-ARIAL_BOLD_PATH = os.path.join('fonts', 'arial_bold.ttf')
-
-TITLE_FONT = pygame.font.Font(ARIAL_BOLD_PATH, 35)
-HEADER_FONT = pygame.font.Font(ARIAL_PATH, 30)
-NUMBER_FONT = pygame.font.Font(ARIAL_PATH, 32)
-BIG_BTN_FONT = pygame.font.Font(ARIAL_PATH, 25)
-SMALL_BTN_FONT = pygame.font.Font(ARIAL_PATH, 15)
 
 WIDTH, HEIGHT = 450, 450
 MENU_HEIGHT = 50
 TOTAL_HEIGHT = HEIGHT + MENU_HEIGHT
 
 FPS = 60
+IDLE_FPS = 4  # frame rate once the player has been idle for IDLE_AFTER ms
+IDLE_AFTER = 2000
 
 LINE_THICKNESS = 2
 
@@ -29,6 +18,7 @@ BLACK = (0, 0, 0)
 LIGHT_GRAY = (200, 200, 200)
 DARK_GRAY = (115, 115, 115)
 RED = (255, 0, 0)
+LIGHT_RED = (255, 210, 210)
 ORANGE = (255, 165, 0)
 
 VALID_NUMS = {'0', '1', '2', '3', '4', '5', '6', '7', '8', '9'}
@@ -0,0 +1,233 @@
+import mmap
+import os
+import struct
+import sys
+from typing import Iterable, Iterator, Optional
+
+import puzzle_format
+from sudoku_generator import pool_map
+from transforms import fingerprint
+
+"""
+Recognizes puzzles that were seen before, up to symmetry.
+
+`SeenIndex` is an on-disk hash set of `transforms.fingerprint`s: an
+open-addressing table of 16-byte keys in a memory-mapped file, kept at
+most half full, so a lookup reads one or two slots whatever its size.
+The table doubles (into a new file) as it fills up, and the operating
+system pages it in and out, so its size is bounded by the disk rather
+than by memory (tens of millions of puzzles take about 1 GB).
+
+`dedup` streams packed puzzle files (see `puzzle_format`) through the
+index, fingerprinting across a process pool, and writes every record
+whose puzzle was not seen before to a new file. Since the index persists,
+later batches are checked against every earlier one. Images made with
+`transforms.variants` count as the same puzzle.
+"""
+
+MAGIC = b'SDKI'
+VERSION = 1
+# magic, version, slots, keys
+HEADER = struct.Struct('<4sB3xQQ')
+KEY_SIZE = 16
+EMPTY = bytes(KEY_SIZE)
+
+
+class SeenIndex:
+    def __init__(self, path: str, capacity: int = 1 << 16) -> None:
+        """Opens the index at `path`, creating it with room for
+        `capacity` keys before its first growth if it does not exist.
+
+        ### Raises:
+        - `ValueError` if `path` is not an index file
+        """
+        self.path = path
+        if not os.path.exists(path) or not os.path.getsize(path):
+            slots = 1
+            while slots < 2 * capacity:
+                slots *= 2
+            _create(path, slots)
+        self._open()
+
+    def _open(self) -> None:
+        with open(self.path, 'r+b') as file:
+            self.data = mmap.mmap(file.fileno(), 0)
+        magic, version, self.slots, self.used = HEADER.unpack_from(self.data)
+        if magic != MAGIC or version != VERSION\
+                or len(self.data) != HEADER.size + self.slots * KEY_SIZE:
+            self.data.close()
+            raise ValueError('Not a puzzle index file.')
+
+    def __len__(self) -> int:
+        return self.used
+
+    def _find(self, key: bytes) -> tuple[int, bool]:
+        """Returns the offset of the slot holding `key`, or of the empty
+        slot it would go in, and whether it was found.
+        """
+        data = self.data
+        mask = self.slots - 1
+        slot = int.from_bytes(key[:8], 'little') & mask
+        while True:
+            offset = HEADER.size + slot * KEY_SIZE
+            current = data[offset:offset + KEY_SIZE]
+            if current == key:
+                return offset, True
+            if current == EMPTY:
+                return offset, False
+            slot = (slot + 1) & mask
+
+    def __contains__(self, key: bytes) -> bool:
+        return self._find(_stored(key))[1]
+
+    def add(self, key: bytes) -> bool:
+        """Adds a `KEY_SIZE`-byte key (e.g. a `transforms.fingerprint`).
+        Returns False if it was already in the index.
+        """
+        key = _stored(key)
+        offset, found = self._find(key)
+        if found:
+            return False
+        self.data[offset:offset + KEY_SIZE] = key
+        self.used += 1
+        HEADER.pack_into(self.data, 0, MAGIC, VERSION, self.slots, self.used)
+        if 2 * self.used > self.slots:
+            self._grow()
+        return True
+
+    def _grow(self) -> None:
+        """Moves the keys into a table twice as large."""
+        grown = self.path + '.grow'
+        _create(grown, 2 * self.slots)
+        old = self.data
+        with open(grown, 'r+b') as file:
+            self.data = mmap.mmap(file.fileno(), 0)
+        self.slots *= 2
+        self.used = 0
+        for offset in range(HEADER.size, len(old), KEY_SIZE):
+            key = old[offset:offset + KEY_SIZE]
+            if key != EMPTY:
+                new, _ = self._find(key)
+                self.data[new:new + KEY_SIZE] = key
+                self.used += 1
+        HEADER.pack_into(self.data, 0, MAGIC, VERSION, self.slots, self.used)
+        self.data.flush()
+        old.close()
+        os.replace(grown, self.path)
+
+    def flush(self) -> None:
+        self.data.flush()
+
+    def close(self) -> None:
+        self.data.flush()
+        self.data.close()
+
+    def __enter__(self) -> 'SeenIndex':
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+
+def _create(path: str, slots: int) -> None:
+    with open(path, 'wb') as file:
+        file.write(HEADER.pack(MAGIC, VERSION, slots, 0))
+        file.truncate(HEADER.size + slots * KEY_SIZE)
+
+
+def _stored(key: bytes) -> bytes:
+    """Returns how `key` is stored: the all-zero key marks empty slots,
+    so it is stored as another key (a 2^-128 chance of a false match).
+    """
+    if len(key) != KEY_SIZE:
+        raise ValueError(f'Index keys are {KEY_SIZE} bytes.')
+    return key if key != EMPTY else EMPTY[:-1] + b'\x01'
+
+
+def _fingerprint_chunk(records: list[bytes], size: int) -> list[Optional[bytes]]:
+    """Process pool task for `dedup`: fingerprints the first board of
+    every packed record (`None` where the canonical form search gave up,
+    see `transforms.canonical`).
+    """
+    length = puzzle_format.packed_size(size)
+    keys = []
+    for record in records:
+        try:
+            keys.append(fingerprint(puzzle_format.unpack(record[:length], size)))
+        except RuntimeError:
+            keys.append(None)
+    return keys
+
+
+def dedup(paths: Iterable[str], out: str, index: str,
+          workers: Optional[int] = None,
+          chunk_size: int = 256) -> tuple[int, int, int]:
+    """Writes the records of the packed files `paths` whose puzzle (their
+    first board) is not in the index at `index` to the packed file `out`,
+    adding them to the index. The first of several copies is kept.
+    Records whose puzzle has too many symmetries to fingerprint are kept
+    without being indexed.
+
+    ### Parameters:
+    - `workers` is the number of fingerprinting processes (all cores if `None`)
+    - `chunk_size` is the number of records sent to a process at a time
+
+    ### Return:
+    - `tuple[int, int, int]` (the records read, the records written, and
+    how many of those could not be fingerprinted)
+
+    ### Raises:
+    - `ValueError` if the files hold different sizes or arities of records
+    """
+    paths = list(paths)
+    layouts = set()
+    for path in paths:
+        with open(path, 'rb') as file:
+            layouts.add(puzzle_format.read_header(file.read(puzzle_format.HEADER.size)))
+    if len(layouts) > 1:
+        raise ValueError('The files hold different kinds of records.')
+    if not layouts:
+        return 0, 0, 0
+    size, arity = layouts.pop()
+
+    def chunks() -> Iterator[list[bytes]]:
+        for path in paths:
+            with puzzle_format.PuzzleFile(path) as puzzles:
+                length = puzzles.record_length
+                for start in range(0, len(puzzles), chunk_size):
+                    first = puzzle_format.HEADER.size + start * length
+                    stop = min(len(puzzles), start + chunk_size)
+                    yield [puzzles.data[offset:offset + length]
+                           for offset in range(first, first + (stop - start) * length,
+                                               length)]
+
+    read = written = unchecked = 0
+    with SeenIndex(index) as seen, open(out, 'wb') as file:
+        puzzle_format.write_header(file, size, arity)
+        for records, keys in pool_map(_fingerprint_chunk, chunks(), size,
+                                      workers=workers):
+            read += len(records)
+            for record, key in zip(records, keys):
+                if key is None:
+                    unchecked += 1
+                elif not seen.add(key):
+                    continue
+                file.write(record)
+                written += 1
+    return read, written, unchecked
+
+
+def main() -> None:
+    """Usage: `python3 dedup.py INDEX OUT FILE...`
+    Copies the puzzles of the packed FILEs not yet in INDEX to OUT.
+    """
+    index, out, *paths = sys.argv[1:]
+    read, written, unchecked = dedup(paths, out, index)
+    with SeenIndex(index) as seen:
+        print(f'Kept {written} of {read} puzzles in {out} ({len(seen)} indexed)')
+    if unchecked:
+        print(f'{unchecked} of them have too many symmetries to check')
+
+
+if __name__ == '__main__':
+    main()
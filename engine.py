@@ -0,0 +1,153 @@
+import random
+import sys
+import time
+from typing import Callable, Optional
+
+from board import Board
+from consts import State, Difficulty
+from hints import Hint, HintEngine
+from journal import Journal
+from sudoku_generator import generate_sudoku, solve
+
+"""
+The game rules without a display: the `State.START/ACTIVE/WON` state
+machine around a `Board`. `sudoku.py` drives an `Engine` from pygame
+events and renders it; scripts and load tests can drive it directly.
+"""
+
+PuzzleSource = Callable[[int, int], list[list[int]]]
+
+
+class Engine:
+    def __init__(self, size: int = 9,
+                 puzzle_source: Optional[PuzzleSource] = None) -> None:
+        """Instantiates the `Engine` in the starting state.
+
+        ### Parameters:
+        - `size` is the number of rows/columns of the boards played
+        - `puzzle_source(size, removed)` returns the puzzle for a new
+        game (`generate_sudoku` by default)
+        """
+        self.size = size
+        self.puzzle_source = puzzle_source or generate_sudoku
+        self.state = State.START
+        self.difficulty = None
+        self.board = None
+        self.hints = None
+        self.journal = None
+
+    def start(self, difficulty: Difficulty) -> None:
+        """Starts a new game at `difficulty` from the start screen."""
+        if self.state != State.START:
+            return
+        self.difficulty = difficulty
+        puzzle = self.puzzle_source(self.size, difficulty.value)
+        self.board = Board(self.size, puzzle=puzzle)
+        self.journal = Journal(self.board)
+        self.state = State.ACTIVE
+
+    def select(self, row: int, col: int) -> None:
+        """Selects the cell at (row, col) of the active game."""
+        if self.state == State.ACTIVE:
+            self.board.select(row, col)
+
+    def enter(self, value: int) -> bool:
+        """Enters `value` (0 to clear) into the selected cell of the
+        active game, moving to `State.WON` if that solves the board.
+        Returns whether the game is won.
+        """
+        board = self.board
+        if self.state == State.ACTIVE and board.selection is not None\
+                and board.is_editable(*board.selection):
+            board.set_current(value)
+            if board.is_solved():
+                self.state = State.WON
+        return self.state == State.WON
+
+    def hint(self) -> Optional[Hint]:
+        """Returns the next deducible move of the active game, or `None`
+        if there is none (see `HintEngine.hint`).
+        """
+        if self.state != State.ACTIVE:
+            return None
+        if self.hints is None or self.hints.board is not self.board:
+            self.hints = HintEngine(self.board)
+        return self.hints.hint()
+
+    def reset(self) -> None:
+        """Clears every value entered in the active game (as one undoable move)."""
+        if self.state == State.ACTIVE:
+            with self.journal.group():
+                self.board.reset_to_original()
+
+    def undo(self) -> bool:
+        """Takes back the last move of the active game.
+        Returns whether there was one.
+        """
+        return self.state == State.ACTIVE and self.journal.undo()
+
+    def redo(self) -> bool:
+        """Makes the last undone move of the active game again, moving
+        to `State.WON` if that solves the board. Returns whether there was one.
+        """
+        if self.state != State.ACTIVE or not self.journal.redo():
+            return False
+        if self.board.is_solved():
+            self.state = State.WON
+        return True
+
+    def restart(self) -> None:
+        """Goes back to the start screen to pick a new difficulty."""
+        self.state = State.START
+
+
+def play(engine: Engine, difficulty: Difficulty, solution: list[list[int]],
+         rng: random.Random, mistakes: float = 0.1) -> int:
+    """Plays one game on `engine` to completion like a player who
+    sometimes enters a random digit and comes back to the cell later.
+    `solution` must solve the puzzle the engine's source returns.
+    Returns the number of moves made.
+    """
+    engine.start(difficulty)
+    board = engine.board
+    empty = [(i, j) for i, row in enumerate(board.data)
+                    for j, val in enumerate(row) if not val]
+    rng.shuffle(empty)
+    moves = 0
+    while engine.state == State.ACTIVE:
+        row, col = empty.pop()
+        engine.select(row, col)
+        if rng.random() < mistakes:
+            engine.enter(rng.randint(1, engine.size))
+            empty.insert(0, (row, col))
+        else:
+            engine.enter(solution[row][col])
+        moves += 1
+    engine.restart()
+    return moves
+
+
+def main() -> None:
+    """Usage: `python3 engine.py [GAMES] [SEED]`
+    Plays GAMES headless games and reports moves per second.
+    """
+    games = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    rng = random.Random(int(sys.argv[2]) if len(sys.argv) > 2 else None)
+    difficulties = list(Difficulty)
+    puzzles = [generate_sudoku(9, d.value, seed=i)
+               for i, d in enumerate(difficulties)]
+    solutions = [solve(puzzle) for puzzle in puzzles]
+    engines = [Engine(puzzle_source=lambda size, removed, i=i: puzzles[i])
+               for i in range(len(puzzles))]
+    start = time.perf_counter()
+    moves = 0
+    for game in range(games):
+        idx = game % len(engines)
+        moves += play(engines[idx], difficulties[idx], solutions[idx], rng)
+    elapsed = time.perf_counter() - start
+    print(f'{games} games, {moves} moves in {elapsed:.2f} s '
+          f'({games/elapsed:.0f} games/s, {moves/elapsed:.0f} moves/s)')
+
+
+if __name__ == '__main__':
+    main()
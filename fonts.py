@@ -0,0 +1,35 @@
+import functools
+import os
+import pygame
+
+"""
+Fonts are loaded on first access, e.g. `fonts.NUMBER_FONT`, so that
+importing modules which draw text costs nothing until a screen is shown.
+Bind them at draw time; `from fonts import NUMBER_FONT` loads eagerly.
+"""
+
+ARIAL_PATH = os.path.join('fonts', 'arial.ttf')
+ARIAL_BOLD_PATH = os.path.join('fonts', 'arial_bold.ttf')
+
+FONT_SPECS = {
+    'TITLE_FONT': (ARIAL_BOLD_PATH, 35),
+    'HEADER_FONT': (ARIAL_PATH, 30),
+    'NUMBER_FONT': (ARIAL_PATH, 32),
+    'BIG_BTN_FONT': (ARIAL_PATH, 25),
+    'SMALL_BTN_FONT': (ARIAL_PATH, 15),
+}
+
+
+@functools.cache
+def get_font(name: str) -> pygame.font.Font:
+    """Loads (once) and returns the font registered as `name` in `FONT_SPECS`."""
+    if not pygame.font.get_init():
+        pygame.font.init()
+    path, size = FONT_SPECS[name]
+    return pygame.font.Font(path, size)
+
+
+def __getattr__(name: str) -> pygame.font.Font:
+    if name in FONT_SPECS:
+        return get_font(name)
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
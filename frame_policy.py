@@ -0,0 +1,44 @@
+import pygame
+
+from consts import FPS, IDLE_FPS, IDLE_AFTER
+
+"""
+Decides how long the event-driven game loop may sleep waiting for input.
+
+Right after input the loop wakes at up to `fps` frames per second so that
+follow-up changes show promptly; after `idle_after` ms without input it
+drops to `idle_fps` wake-ups per second, and with `idle_fps = 0` it
+sleeps until the next event.
+"""
+
+
+class FramePolicy:
+    def __init__(self, fps: int = FPS, idle_fps: int = IDLE_FPS,
+                 idle_after: int = IDLE_AFTER) -> None:
+        self.fps = fps
+        self.idle_fps = idle_fps
+        self.idle_after = idle_after
+        self.last_input = pygame.time.get_ticks()
+
+    def is_idle(self) -> bool:
+        return pygame.time.get_ticks() - self.last_input >= self.idle_after
+
+    def timeout(self) -> int:
+        """Returns the ms to wait for an event (0 to wait indefinitely)."""
+        fps = self.idle_fps if self.is_idle() else self.fps
+        return max(1, 1000 // fps) if fps else 0
+
+    def record(self, events: list[pygame.event.Event]) -> None:
+        """Notes the events handled this frame; any input resets the idle timer."""
+        if events:
+            self.last_input = pygame.time.get_ticks()
+
+    def wait(self) -> list[pygame.event.Event]:
+        """Blocks until an event arrives or the timeout passes and
+        returns every pending event (an empty list on timeout).
+        """
+        event = pygame.event.wait(self.timeout())
+        events = [] if event.type == pygame.NOEVENT else [event]
+        events += pygame.event.get()
+        self.record(events)
+        return events
@@ -0,0 +1,278 @@
+import math
+from typing import Callable, Iterable, NamedTuple, Optional, TYPE_CHECKING
+
+from sudoku_generator import flatten, layout
+
+if TYPE_CHECKING:
+    from board import Board
+
+"""
+Finds the next move a player can deduce, and the technique that deduces it.
+
+Candidates are flat masks like the solver's (bit `d - 1` for digit d),
+with 0 for filled cells. Every technique looks at the candidates and
+returns one `Step`: either a placement (naked/hidden single) or a set of
+eliminations that may lead to one. `TECHNIQUES` lists them from easiest
+to hardest, which is also the order they are tried in.
+"""
+
+
+class Step(NamedTuple):
+    technique: str
+    cell: Optional[int]  # the flat index placed, `None` for eliminations
+    bit: int  # the digit placed, as a mask bit (0 for eliminations)
+    eliminations: tuple[tuple[int, int], ...] = ()  # (flat index, removed mask)
+
+
+class Hint(NamedTuple):
+    row: int
+    col: int
+    value: int
+    technique: str  # the hardest technique needed to find the move
+    steps: tuple[Step, ...]  # eliminations made first, then the placement
+
+
+def candidates(grid: list[list[int]]) -> list[int]:
+    """Returns the flat candidate masks of `grid` (no deductions applied)."""
+    n = len(grid)
+    full = (1 << n) - 1
+    values = list(flatten(grid))
+    peers, _ = layout(n)
+    cand = []
+    for i, val in enumerate(values):
+        if val:
+            cand.append(0)
+            continue
+        used = 0
+        for p in peers[i]:
+            if values[p]:
+                used |= 1 << (values[p] - 1)
+        cand.append(full & ~used)
+    return cand
+
+
+def naked_single(cand: list[int], n: int) -> Optional[Step]:
+    """A cell with one candidate left."""
+    for i, mask in enumerate(cand):
+        if mask and not mask & (mask - 1):
+            return Step('naked single', i, mask)
+    return None
+
+
+def hidden_single(cand: list[int], n: int) -> Optional[Step]:
+    """A digit with one place left in a row, column or box."""
+    _, units = layout(n)
+    for unit in units:
+        once = twice = 0
+        for i in unit:
+            mask = cand[i]
+            twice |= once & mask
+            once |= mask
+        hidden = once & ~twice
+        if hidden:
+            bit = hidden & -hidden
+            cell = next(i for i in unit if cand[i] & bit)
+            return Step('hidden single', cell, bit)
+    return None
+
+
+def _eliminate(technique: str, cand: list[int], cells: Iterable[int],
+               bits: int) -> Optional[Step]:
+    """Returns a `Step` removing `bits` from those of `cells` holding any."""
+    removed = tuple((i, cand[i] & bits) for i in cells if cand[i] & bits)
+    return Step(technique, None, 0, removed) if removed else None
+
+
+def pointing_pair(cand: list[int], n: int) -> Optional[Step]:
+    """A digit confined to one row (column) of a box is removed
+    from the rest of that row (column).
+    """
+    _, units = layout(n)
+    for box in units[2*n:]:
+        for d in range(n):
+            bit = 1 << d
+            cells = [i for i in box if cand[i] & bit]
+            if len(cells) < 2:
+                continue
+            rows = {i // n for i in cells}
+            cols = {i % n for i in cells}
+            if len(rows) == 1:
+                line = units[rows.pop()]
+            elif len(cols) == 1:
+                line = units[n + cols.pop()]
+            else:
+                continue
+            step = _eliminate('pointing pair', cand,
+                              (i for i in line if i not in box), bit)
+            if step is not None:
+                return step
+    return None
+
+
+def box_line_reduction(cand: list[int], n: int) -> Optional[Step]:
+    """A digit confined to one box within a row (column) is removed
+    from the rest of that box.
+    """
+    _, units = layout(n)
+    k = int(math.sqrt(n))
+    for line in units[:2*n]:
+        for d in range(n):
+            bit = 1 << d
+            boxes = {i // n // k * k + i % n // k for i in line if cand[i] & bit}
+            if len(boxes) != 1:
+                continue
+            step = _eliminate('box/line reduction', cand,
+                              (i for i in units[2*n + boxes.pop()] if i not in line),
+                              bit)
+            if step is not None:
+                return step
+    return None
+
+
+def naked_pair(cand: list[int], n: int) -> Optional[Step]:
+    """Two cells of a unit with the same two candidates take
+    both digits away from the rest of the unit.
+    """
+    _, units = layout(n)
+    for unit in units:
+        seen = set()
+        for i in unit:
+            mask = cand[i]
+            if mask.bit_count() != 2:
+                continue
+            if mask in seen:
+                step = _eliminate('naked pair', cand,
+                                  (j for j in unit if cand[j] != mask), mask)
+                if step is not None:
+                    return step
+            seen.add(mask)
+    return None
+
+
+def x_wing(cand: list[int], n: int) -> Optional[Step]:
+    """A digit whose only two places in each of two rows (columns) are in
+    the same two columns (rows) is removed from the rest of those columns
+    (rows).
+    """
+    _, units = layout(n)
+    for d in range(n):
+        bit = 1 << d
+        for base, cover in ((0, n), (n, 0)):
+            seen = {}
+            for u in range(n):
+                # the positions of the digit along the line, as a mask
+                spots = 0
+                for pos, i in enumerate(units[base + u]):
+                    if cand[i] & bit:
+                        spots |= 1 << pos
+                if spots.bit_count() != 2:
+                    continue
+                if spots in seen:
+                    lines = (seen[spots], u)
+                    crossing = [pos for pos in range(n) if spots >> pos & 1]
+                    step = _eliminate(
+                        'x-wing', cand,
+                        (i for pos in crossing
+                           for other, i in enumerate(units[cover + pos])
+                           if other not in lines),
+                        bit)
+                    if step is not None:
+                        return step
+                seen[spots] = u
+    return None
+
+
+TECHNIQUES: tuple[tuple[str, Callable[[list[int], int], Optional[Step]]], ...] = (
+    ('naked single', naked_single),
+    ('hidden single', hidden_single),
+    ('pointing pair', pointing_pair),
+    ('box/line reduction', box_line_reduction),
+    ('naked pair', naked_pair),
+    ('x-wing', x_wing),
+)
+RANK = {name: rank for rank, (name, _) in enumerate(TECHNIQUES)}
+
+
+def next_step(cand: list[int], n: int) -> Optional[Step]:
+    """Returns the step found by the easiest technique that finds one,
+    or `None` if none of `TECHNIQUES` applies.
+    """
+    for _, technique in TECHNIQUES:
+        step = technique(cand, n)
+        if step is not None:
+            return step
+    return None
+
+
+def apply_step(cand: list[int], step: Step, n: int) -> None:
+    """Applies `step` to `cand` in place."""
+    if step.cell is None:
+        for i, mask in step.eliminations:
+            cand[i] &= ~mask
+        return
+    peers, _ = layout(n)
+    cand[step.cell] = 0
+    for p in peers[step.cell]:
+        cand[p] &= ~step.bit
+
+
+def find_hint(cand: list[int], n: int) -> Optional[Hint]:
+    """Returns the next placement deducible from `cand`, or `None` if
+    the techniques get stuck. `cand` is not modified.
+    """
+    cand = cand.copy()
+    steps = []
+    while True:
+        step = next_step(cand, n)
+        if step is None:
+            return None
+        steps.append(step)
+        if step.cell is not None:
+            technique = max((s.technique for s in steps), key=RANK.__getitem__)
+            return Hint(step.cell // n, step.cell % n, step.bit.bit_length(),
+                        technique, tuple(steps))
+        apply_step(cand, step, n)
+
+
+class HintEngine:
+    def __init__(self, board: 'Board') -> None:
+        """Keeps the candidates of `board` up to date as values are
+        entered, so that `hint` only has to run the techniques.
+        """
+        self.board = board
+        self.n = board.size
+        self.cand = candidates(board.data)
+        board.listeners.append(self.update)
+
+    def update(self, row: int, col: int, old: int, new: int) -> None:
+        """`Board` listener: adjusts the candidates around (row, col)
+        after its value changed from `old` to `new`.
+        """
+        board = self.board
+        n = self.n
+        peers, _ = layout(n)
+        idx = row * n + col
+        if new:
+            self.cand[idx] = 0
+            bit = 1 << (new - 1)
+            for p in peers[idx]:
+                self.cand[p] &= ~bit
+        else:
+            self.cand[idx] = board.candidates(row, col)
+        if old:
+            # `old` comes back to the empty peers it no longer clashes with
+            bit = 1 << (old - 1)
+            for p in peers[idx]:
+                if not board.values[p] and board.candidates(*divmod(p, n)) & bit:
+                    self.cand[p] |= bit
+
+    def hint(self) -> Optional[Hint]:
+        """Returns the next deducible move of the board, or `None` if the
+        board has conflicts or the techniques get stuck.
+        """
+        if self.board.conflicts:
+            return None
+        if any(not mask for mask, val in zip(self.cand, self.board.values)
+               if not val):
+            return None
+        return find_hint(self.cand, self.n)
@@ -0,0 +1,178 @@
+import contextlib
+import struct
+from array import array
+from typing import Iterator
+
+from board import Board
+
+"""
+An undo/redo history of the values of a `Board`.
+
+Every change the board reports to its listeners is appended to a flat
+`array` as one 32-bit word `idx << 10 | old << 5 | new`, and each entry
+(one move, or a group such as a reset) ends at an offset stored in
+`ends`. Undo and redo replay one entry. Every `interval` entries a copy
+of the values is kept, so jumping anywhere restores the closest earlier
+snapshot and replays fewer than `interval` entries.
+
+Making a move after undoing discards the undone entries, as in editors.
+"""
+
+# interval, size, position, entries, changes
+HEADER = struct.Struct('<HBIII')
+WORD = array('I').itemsize
+
+
+class Journal:
+    def __init__(self, board: Board, interval: int = 64) -> None:
+        """Starts recording the moves made on `board` from its current values.
+
+        ### Parameters:
+        - `interval` is the number of entries between snapshots
+        """
+        self.board = board
+        self.interval = interval
+        self.changes = array('I')
+        self.ends = array('I')
+        self.position = 0
+        self.snapshots = [bytes(board.values)]
+        self.grouping = False
+        self.replaying = False
+        board.listeners.append(self.record)
+
+    def __len__(self) -> int:
+        """Returns the number of entries, including undone ones."""
+        return len(self.ends)
+
+    def record(self, row: int, col: int, old: int, new: int) -> None:
+        """`Board` listener: appends the change as a new entry (or to the
+        open group), discarding any undone entries first.
+        """
+        if self.replaying or old == new:
+            return
+        self.truncate()
+        self.changes.append((row * self.board.size + col) << 10 | old << 5 | new)
+        if not self.grouping:
+            self.end_entry()
+
+    def truncate(self) -> None:
+        """Discards the entries after `position`."""
+        if self.position == len(self.ends):
+            return
+        del self.changes[self.start(self.position):]
+        del self.ends[self.position:]
+        del self.snapshots[self.position // self.interval + 1:]
+
+    def end_entry(self) -> None:
+        self.ends.append(len(self.changes))
+        self.position += 1
+        if self.position % self.interval == 0:
+            self.snapshots.append(bytes(self.board.values))
+
+    def start(self, entry: int) -> int:
+        """Returns the offset in `changes` of the first change of `entry`."""
+        return self.ends[entry - 1] if entry else 0
+
+    @contextlib.contextmanager
+    def group(self) -> Iterator[None]:
+        """Records every change made inside the `with` block as one entry."""
+        self.grouping = True
+        try:
+            yield
+        finally:
+            self.grouping = False
+            if len(self.changes) > self.start(len(self.ends)):
+                self.end_entry()
+
+    def apply(self, entry: int, forward: bool) -> None:
+        """Redoes (`forward`) or undoes one entry on the board."""
+        changes = self.changes[self.start(entry):self.ends[entry]]
+        if not forward:
+            changes.reverse()
+        n = self.board.size
+        self.replaying = True
+        try:
+            for change in changes:
+                row, col = divmod(change >> 10, n)
+                self.board.set_value(row, col,
+                                     change & 31 if forward else change >> 5 & 31)
+        finally:
+            self.replaying = False
+
+    def undo(self) -> bool:
+        """Undoes the last entry. Returns False if there was none."""
+        if not self.position:
+            return False
+        self.position -= 1
+        self.apply(self.position, False)
+        return True
+
+    def redo(self) -> bool:
+        """Redoes the last undone entry. Returns False if there was none."""
+        if self.position == len(self.ends):
+            return False
+        self.apply(self.position, True)
+        self.position += 1
+        return True
+
+    def jump(self, position: int) -> None:
+        """Brings the board to how it was after `position` entries,
+        stepping there if it is close, otherwise from the closest
+        earlier snapshot.
+        """
+        if not 0 <= position <= len(self.ends):
+            raise IndexError(f'Journal position out of range: {position}')
+        if abs(position - self.position) > self.interval:
+            base = position // self.interval
+            self.replaying = True
+            try:
+                self.board.load_values(self.snapshots[base])
+            finally:
+                self.replaying = False
+            self.position = base * self.interval
+        while self.position < position:
+            self.redo()
+        while self.position > position:
+            self.undo()
+
+    def dumps(self) -> bytes:
+        """Serializes the puzzle, the snapshots and every entry (undone
+        ones too, in native byte order), to be resumed with `loads`.
+        """
+        board = self.board
+        return b''.join((
+            HEADER.pack(self.interval, board.size, self.position,
+                        len(self.ends), len(self.changes)),
+            board.initial,
+            *self.snapshots,
+            self.ends.tobytes(),
+            self.changes.tobytes(),
+        ))
+
+    @classmethod
+    def loads(cls, data: bytes) -> 'Journal':
+        """Rebuilds a board and its journal from `dumps` output, at the
+        position the journal was saved at. Only the entries since the
+        closest earlier snapshot are replayed, fewer than `interval`.
+        """
+        interval, size, position, entries, count = HEADER.unpack_from(data)
+        cells = size * size
+        offset = HEADER.size
+        initial = data[offset:offset+cells]
+        offset += cells
+        snapshots = []
+        for _ in range(entries // interval + 1):
+            snapshots.append(bytes(data[offset:offset+cells]))
+            offset += cells
+        board = Board(size, puzzle=[list(initial[i:i+size])
+                                    for i in range(0, cells, size)])
+        base = position // interval
+        board.load_values(snapshots[base])
+        journal = cls(board, interval)
+        journal.snapshots = snapshots
+        journal.position = base * interval
+        journal.ends.frombytes(data[offset:offset + WORD*entries])
+        offset += WORD * entries
+        journal.changes.frombytes(data[offset:offset + WORD*count])
+        journal.jump(position)
+        return journal
@@ -0,0 +1,201 @@
+import os
+import random
+import sys
+import threading
+from typing import Optional
+
+import puzzle_format
+from sudoku_generator import generate_puzzle
+from transforms import generate_variants
+
+"""
+A store of pre-generated puzzle/solution pairs, so that starting a game
+costs one lookup instead of a generation run.
+
+Each (size, removed) bucket is a packed puzzle file (see `puzzle_format`)
+of puzzle/solution records. Drawing moves
+the last record into the drawn slot and truncates the file, so it is
+O(1) regardless of how many puzzles the bucket holds. Refills can derive
+several puzzles from every generated one by symmetry (see `transforms`).
+"""
+
+Grid = list[list[int]]
+
+
+class PuzzleBank:
+    def __init__(self, root: str = 'puzzles',
+                 low_water: int = 5, capacity: int = 20,
+                 variants: int = 1, processes: int = 0) -> None:
+        """Opens (creating if needed) the bank stored under `root`.
+
+        ### Parameters:
+        - `root` is the directory holding one file per bucket
+        - `low_water` is the bucket count below which a draw
+        starts a background refill
+        - `capacity` is the count a refill tops a bucket up to
+        - `variants` is the number of puzzles a refill derives from
+        every generated one (see `transforms.generate_variants`)
+        - `processes` is the size of a process pool that refills generate
+        on, so that they don't compete with the caller for the GIL
+        (0 generates on the refill thread itself)
+        """
+        os.makedirs(root, exist_ok=True)
+        self.root = root
+        self.low_water = low_water
+        self.capacity = capacity
+        self.variants = variants
+        self.processes = processes
+        self.pool = None
+        self.closed = False
+        self.lock = threading.Lock()
+        self.refilling: dict[tuple[int, int], threading.Thread] = {}
+
+    def path(self, size: int, removed: int) -> str:
+        """Returns the file backing the (size, removed) bucket."""
+        return os.path.join(self.root, f'{size}x{size}-{removed}.sdk')
+
+    def count(self, size: int, removed: int) -> int:
+        """Returns the number of puzzles in the (size, removed) bucket."""
+        try:
+            length = os.path.getsize(self.path(size, removed))
+        except FileNotFoundError:
+            return 0
+        return max(0, length - puzzle_format.HEADER.size)\
+            // puzzle_format.record_size(size, 2)
+
+    def add(self, size: int, removed: int, puzzle: Grid, solution: Grid) -> None:
+        """Appends a puzzle/solution pair to the (size, removed) bucket.
+        A partial record left by an interrupted write is dropped first.
+        """
+        record = puzzle_format.pack(puzzle) + puzzle_format.pack(solution)
+        header = puzzle_format.HEADER.size
+        with self.lock:
+            with open(self.path(size, removed), 'ab') as file:
+                end = file.seek(0, os.SEEK_END)
+                if end < header:
+                    file.truncate(0)
+                    puzzle_format.write_header(file, size, 2)
+                elif (end - header) % len(record):
+                    file.truncate(end - (end - header) % len(record))
+                file.write(record)
+
+    def fill(self, size: int, removed: int, target: int) -> None:
+        """Generates puzzles until the bucket holds `target` of them,
+        or until the bank is closed.
+        """
+        if self.processes:
+            # imported here to keep it out of the game's startup
+            from concurrent.futures import (
+                CancelledError,
+                ProcessPoolExecutor,
+                as_completed,
+            )
+            with self.lock:
+                if self.closed:
+                    return
+                if self.pool is None:
+                    self.pool = ProcessPoolExecutor(self.processes)
+                pool = self.pool
+            try:
+                while (missing := target - self.count(size, removed)) > 0:
+                    # one variant group per task, each added as it finishes
+                    futures = [pool.submit(_generate_pairs, size, removed,
+                                           min(self.variants, missing - start),
+                                           self.variants)
+                               for start in range(0, missing, self.variants)]
+                    for future in as_completed(futures):
+                        for puzzle, solution in future.result():
+                            self.add(size, removed, puzzle, solution)
+            except (CancelledError, RuntimeError):
+                # the pool was shut down by `close`
+                if not self.closed:
+                    raise
+            return
+        puzzles = generate_variants(size=size, removed=removed,
+                                    per_seed=self.variants, unique=True)
+        while not self.closed and self.count(size, removed) < target:
+            self.add(size, removed, *next(puzzles))
+
+    def close(self) -> None:
+        """Stops refilling: generations that have not started are
+        cancelled, and running ones end after their current puzzle.
+        """
+        with self.lock:
+            self.closed = True
+            pool, self.pool = self.pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def refill(self, size: int, removed: int) -> None:
+        """Tops the bucket up to `capacity` on a background thread,
+        unless a refill of that bucket is already running.
+        """
+        key = (size, removed)
+        with self.lock:
+            thread = self.refilling.get(key)
+            if thread is not None and thread.is_alive():
+                return
+            thread = threading.Thread(target=self.fill,
+                                      args=(size, removed, self.capacity),
+                                      daemon=True)
+            self.refilling[key] = thread
+        thread.start()
+
+    def draw(self, size: int = 9, removed: int = 0) -> tuple[Grid, Grid]:
+        """Removes and returns a random puzzle/solution pair from the
+        (size, removed) bucket, refilling it in the background when it
+        runs low. Generates one on the spot if the bucket is empty.
+        """
+        length = puzzle_format.packed_size(size)
+        with self.lock:
+            record = self._pop_random(self.path(size, removed), 2 * length)
+        if record is None or self.count(size, removed) < self.low_water:
+            self.refill(size, removed)
+        if record is None:
+            return generate_puzzle(size, removed, unique=True)
+        return (puzzle_format.unpack(record[:length], size),
+                puzzle_format.unpack(record[length:], size))
+
+    def _pop_random(self, path: str, length: int) -> Optional[bytes]:
+        """Swap-removes a random `length`-byte record from the file at `path`.
+        Must be called with `self.lock` held.
+        """
+        try:
+            file = open(path, 'r+b')
+        except FileNotFoundError:
+            return None
+        header = puzzle_format.HEADER.size
+        with file:
+            total = max(0, file.seek(0, os.SEEK_END) - header) // length
+            if not total:
+                return None
+            idx = random.randrange(total)
+            file.seek(header + idx * length)
+            record = file.read(length)
+            if idx != total - 1:
+                file.seek(header + (total - 1) * length)
+                last = file.read(length)
+                file.seek(header + idx * length)
+                file.write(last)
+            file.truncate(header + (total - 1) * length)
+        return record
+
+
+def _generate_pairs(size: int, removed: int, count: int,
+                    variants: int) -> list[tuple[Grid, Grid]]:
+    """Process pool task for `PuzzleBank.fill`."""
+    return list(generate_variants(count, size, removed, per_seed=variants,
+                                  unique=True))
+
+
+def main() -> None:
+    """Usage: `python3 puzzle_bank.py SIZE REMOVED COUNT [VARIANTS]`
+    Fills the (SIZE, REMOVED) bucket of the default bank up to COUNT,
+    deriving VARIANTS puzzles (default 1) from every generated one.
+    """
+    size, removed, count, variants = (list(map(int, sys.argv[1:5])) + [1])[:4]
+    PuzzleBank(variants=variants).fill(size, removed, count)
+
+
+if __name__ == '__main__':
+    main()
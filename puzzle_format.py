@@ -0,0 +1,166 @@
+import math
+import mmap
+import struct
+import sys
+from typing import BinaryIO, Iterable, Iterator, Sequence
+
+"""
+Packed binary storage for boards.
+
+A file starts with an 8-byte header: the magic `b'SDKP'`, the format
+version, the board size, the bits used per cell and the number of boards
+per record (1 for bare puzzles, 2 for puzzle/solution pairs). Records
+follow back to back, each board packed little-endian at `bits` per cell
+and padded to a whole byte. A 9x9 board takes 41 bytes at 4 bits per cell.
+"""
+
+MAGIC = b'SDKP'
+VERSION = 1
+HEADER = struct.Struct('<4sBBBB')
+
+Grid = list[list[int]]
+
+_NIBBLES = bytes.maketrans(b'0123456789abcdef', bytes(range(16)))
+
+
+def cell_bits(size: int) -> int:
+    """Returns the bits needed to store one cell (0 to size) of a board."""
+    return size.bit_length()
+
+
+def packed_size(size: int) -> int:
+    """Returns the number of bytes one packed board of `size` takes."""
+    return (size * size * cell_bits(size) + 7) // 8
+
+
+def pack(grid: Grid) -> bytes:
+    """Packs a board into `packed_size(len(grid))` bytes."""
+    size = len(grid)
+    bits = cell_bits(size)
+    if bits == 4:
+        digits = ''.join('%x' % val for row in grid for val in row)
+        if len(digits) % 2:
+            digits += '0'
+        # hex pairs are high nibble first, so swap to keep cell 0 in the low nibble
+        return bytes.fromhex(''.join(digits[i+1] + digits[i]
+                                     for i in range(0, len(digits), 2)))
+    packed = 0
+    for i, val in enumerate(val for row in grid for val in row):
+        packed |= val << (i * bits)
+    return packed.to_bytes(packed_size(size), 'little')
+
+
+def unpack(data: bytes, size: int) -> Grid:
+    """Unpacks a board of `size` packed by `pack`."""
+    bits = cell_bits(size)
+    cells = size * size
+    if bits == 4:
+        vals = list(bytes(data).hex().encode().translate(_NIBBLES))
+        vals[::2], vals[1::2] = vals[1::2], vals[::2]
+    else:
+        packed = int.from_bytes(data, 'little')
+        mask = (1 << bits) - 1
+        vals = [packed >> (i * bits) & mask for i in range(cells)]
+    return [vals[i:i+size] for i in range(0, cells, size)]
+
+
+def record_size(size: int, arity: int = 1) -> int:
+    """Returns the bytes per record of `arity` boards of `size`."""
+    return arity * packed_size(size)
+
+
+def write_header(file: BinaryIO, size: int, arity: int = 1) -> None:
+    """Writes the file header for records of `arity` boards of `size`."""
+    file.write(HEADER.pack(MAGIC, VERSION, size, cell_bits(size), arity))
+
+
+def read_header(data: bytes) -> tuple[int, int]:
+    """Checks a file header and returns its (size, arity).
+
+    ### Raises:
+    - `ValueError` if the header is not a supported puzzle file header
+    """
+    if len(data) < HEADER.size:
+        raise ValueError('Truncated puzzle file header.')
+    magic, version, size, bits, arity = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION or bits != cell_bits(size)\
+            or not math.sqrt(size).is_integer() or arity < 1:
+        raise ValueError('Not a packed puzzle file.')
+    return size, arity
+
+
+def write_puzzles(path: str, records: Iterable[Sequence[Grid]],
+                  size: int = 9, arity: int = 1) -> int:
+    """Writes records of `arity` boards each (e.g. `(puzzle,)` or
+    `(puzzle, solution)`) to a new packed file at `path`.
+    Returns the number of records written.
+    """
+    count = 0
+    with open(path, 'wb') as file:
+        write_header(file, size, arity)
+        for record in records:
+            if len(record) != arity:
+                raise ValueError(f'Expected {arity} boards per record.')
+            file.write(b''.join(pack(grid) for grid in record))
+            count += 1
+    return count
+
+
+class PuzzleFile:
+    def __init__(self, path: str) -> None:
+        """Memory-maps the packed file at `path` for lazy, random-access reads.
+        Nothing is parsed until a record is accessed.
+        """
+        with open(path, 'rb') as file:
+            self.data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.size, self.arity = read_header(self.data)
+        self.board_length = packed_size(self.size)
+        self.record_length = record_size(self.size, self.arity)
+
+    def __len__(self) -> int:
+        return (len(self.data) - HEADER.size) // self.record_length
+
+    def __getitem__(self, idx: int) -> tuple[Grid, ...]:
+        if not -len(self) <= idx < len(self):
+            raise IndexError('Puzzle index out of range.')
+        start = HEADER.size + (idx % len(self)) * self.record_length
+        return tuple(unpack(self.data[offset:offset+self.board_length], self.size)
+                     for offset in range(start, start + self.record_length,
+                                         self.board_length))
+
+    def __iter__(self) -> Iterator[tuple[Grid, ...]]:
+        for idx in range(len(self)):
+            yield self[idx]
+
+    def close(self) -> None:
+        self.data.close()
+
+    def __enter__(self) -> 'PuzzleFile':
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+
+def read_puzzles(path: str) -> Iterator[tuple[Grid, ...]]:
+    """Lazily yields every record of the packed file at `path`."""
+    with PuzzleFile(path) as puzzles:
+        yield from puzzles
+
+
+def main() -> None:
+    """Usage: `python3 puzzle_format.py OUT COUNT [SIZE] [REMOVED] [SEED]`
+    Generates COUNT unique puzzles across all cores into the packed file OUT.
+    """
+    from sudoku_generator import generate_batch
+    path, count, *rest = sys.argv[1:]
+    size, removed, seed = (list(map(int, rest)) + [9, 40, None][len(rest):])[:3]
+    written = write_puzzles(path,
+                            ((board,) for _, board in generate_batch(
+                                int(count), size, removed, seed, unique=True)),
+                            size)
+    print(f'Wrote {written} puzzles to {path}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+import itertools
+import math
+import sys
+from collections import Counter
+from typing import Iterable, Iterator, NamedTuple, Optional
+
+import puzzle_format
+from hints import RANK, Step, apply_step, candidates, next_step
+from sudoku_generator import flatten, iter_digits, pool_map
+
+"""
+Rates puzzles by how a person would solve them rather than by clue count.
+
+The puzzle is solved with the techniques of `hints`, easiest first. When
+they get stuck the solver guesses on the cell with the fewest candidates
+and carries on, counting every guess as a search branch. The score is
+the weight of the hardest technique needed, or `SEARCH_WEIGHT` plus the
+log2 of the branches taken if the puzzle needed guessing.
+"""
+
+WEIGHTS = {
+    'naked single': 1.0,
+    'hidden single': 1.5,
+    'pointing pair': 2.6,
+    'box/line reduction': 2.8,
+    'naked pair': 3.0,
+    'x-wing': 3.2,
+}
+SEARCH_WEIGHT = 5.0
+
+
+class Rating(NamedTuple):
+    score: float
+    hardest: str  # the hardest technique used ('search' if guessing was needed)
+    techniques: dict[str, int]  # how many steps each technique made
+    branches: int  # the number of guesses made
+    solved: bool
+
+
+def _solve(cand: list[int], empty: set[int], n: int,
+           techniques: Counter, branches: list[int]) -> bool:
+    """Solves `cand` in place with the techniques, guessing when they get
+    stuck. Returns False if the position has no solution.
+    """
+    while empty:
+        if any(not cand[i] for i in empty):
+            return False
+        step = next_step(cand, n)
+        if step is None:
+            break
+        techniques[step.technique] += 1
+        apply_step(cand, step, n)
+        empty.discard(step.cell)
+    else:
+        return True
+    cell = min(empty, key=lambda i: cand[i].bit_count())
+    for val in iter_digits(cand[cell]):
+        branches[0] += 1
+        guess = cand.copy()
+        apply_step(guess, Step('search', cell, 1 << (val - 1)), n)
+        if _solve(guess, empty - {cell}, n, techniques, branches):
+            cand[:] = guess
+            return True
+    return False
+
+
+def rate(grid: list[list[int]]) -> Rating:
+    """Rates `grid` (see the module docstring).
+
+    ### Return:
+    - `Rating` (`solved` is False, and the score only reflects the
+    work done, if the puzzle has no solution)
+    """
+    n = len(grid)
+    cand = candidates(grid)
+    empty = {i for i, val in enumerate(flatten(grid)) if not val}
+    techniques = Counter()
+    branches = [0]
+    solved = _solve(cand, empty, n, techniques, branches)
+    if branches[0]:
+        hardest = 'search'
+        score = SEARCH_WEIGHT + math.log2(1 + branches[0])
+    elif techniques:
+        hardest = max(techniques, key=RANK.__getitem__)
+        score = WEIGHTS[hardest]
+    else:
+        hardest = 'none'
+        score = 0.0
+    return Rating(round(score, 2), hardest, dict(techniques), branches[0], solved)
+
+
+def rate_batch(puzzles: Iterable[list[list[int]]],
+               workers: Optional[int] = None,
+               chunk_size: int = 64) -> Iterator[Rating]:
+    """Rates `puzzles` across a process pool, yielding the ratings in order.
+    `puzzles` is read lazily (see `pool_map`), so whole puzzle files can
+    be rated in bounded memory.
+
+    ### Parameters:
+    - `workers` is the number of processes (all cores if `None`)
+    - `chunk_size` is the number of puzzles sent to a process at a time
+    """
+    puzzles = iter(puzzles)
+    chunks = iter(lambda: list(itertools.islice(puzzles, chunk_size)), [])
+    for _, ratings in pool_map(_rate_chunk, chunks, workers=workers):
+        yield from ratings
+
+
+def _rate_chunk(puzzles: list[list[list[int]]]) -> list[Rating]:
+    """Process pool task for `rate_batch`."""
+    return [rate(puzzle) for puzzle in puzzles]
+
+
+def main() -> None:
+    """Usage: `python3 rating.py FILE...`
+    Rates every puzzle of the packed files (e.g. puzzle bank buckets)
+    across all cores and prints how the scores are distributed.
+    """
+    for path in sys.argv[1:]:
+        puzzles = (record[0] for record in puzzle_format.read_puzzles(path))
+        scores = Counter()
+        hardest = Counter()
+        for rating in rate_batch(puzzles):
+            scores[math.floor(rating.score)] += 1
+            hardest[rating.hardest] += 1
+        print(f'{path}: {sum(scores.values())} puzzles')
+        for score, count in sorted(scores.items()):
+            print(f'  score {score}-{score+1}: {count}')
+        for technique, count in hardest.most_common():
+            print(f'  hardest {technique}: {count}')
+
+
+if __name__ == '__main__':
+    main()
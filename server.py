@@ -0,0 +1,275 @@
+import argparse
+import asyncio
+import functools
+import itertools
+import json
+import os
+import random
+import time
+from typing import Any, Optional
+
+from board import Board
+from consts import Difficulty
+from sudoku_generator import generate_sudoku
+
+"""
+Hosts games over line-delimited JSON, for clients other than the pygame
+front end: `python3 server.py serve` starts the server and
+`python3 server.py load` measures it with many concurrent sessions.
+
+Every request is one JSON object per line with an `op` and an optional
+`id` echoed back in the response; responses carry `ok` and either the
+result fields or an `error`. A connection can hold several sessions,
+each wrapping a `Board`, which are closed when it disconnects:
+- `{"op": "new", "difficulty": "easy"|"medium"|"hard", "size": 9, "seed": 1}`
+  (all optional, `"removed": 40` overrides the difficulty)
+  -> `{"session": 1, "puzzle": [[...], ...]}`
+- `{"op": "select", "session": 1, "row": 0, "col": 2}` -> `{"selection": [0, 2]}`
+- `{"op": "enter", "session": 1, "value": 5}` (with `row`/`col` to select
+  first) -> `{"value": 5, "conflicting": false, "solved": false}`
+- `{"op": "reset", "session": 1}`, `{"op": "state", "session": 1}`
+  -> `{"values": [[...], ...], "selection": null, "solved": false}`
+- `{"op": "close", "session": 1}` -> `{}`
+
+Generation runs on a process pool so it never blocks the event loop.
+"""
+
+HOST = '127.0.0.1'
+PORT = 8765
+
+
+class GameServer:
+    def __init__(self, workers: Optional[int] = None) -> None:
+        """Instantiates a server whose puzzles are generated
+        by `workers` processes (all cores if `None`).
+        """
+        from concurrent.futures import ProcessPoolExecutor
+        self.pool = ProcessPoolExecutor(workers or os.cpu_count() or 1)
+        self.sessions: dict[int, Board] = {}
+        self.ids = itertools.count(1)
+
+    async def handle(self, reader: asyncio.StreamReader,
+                     writer: asyncio.StreamWriter) -> None:
+        """Serves one connection until it closes."""
+        owned: set[int] = set()
+        try:
+            async for line in reader:
+                request = None
+                try:
+                    request = json.loads(line)
+                    response = await self.dispatch(request, owned)
+                    response['ok'] = True
+                except (ValueError, KeyError, TypeError, RuntimeError) as error:
+                    response = {'ok': False, 'error': f'{type(error).__name__}: {error}'}
+                if isinstance(request, dict) and 'id' in request:
+                    response['id'] = request['id']
+                writer.write(json.dumps(response).encode() + b'\n')
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            for session in owned:
+                self.sessions.pop(session, None)
+            writer.close()
+
+    async def dispatch(self, request: dict[str, Any],
+                       owned: set[int]) -> dict[str, Any]:
+        """Runs one request of a connection owning the sessions `owned`.
+
+        ### Raises:
+        - `ValueError`, `KeyError` or `TypeError` for malformed requests
+        - `RuntimeError` if generating a puzzle failed
+        """
+        if not isinstance(request, dict):
+            raise TypeError('Requests must be JSON objects')
+        op = request['op']
+        if op == 'new':
+            return await self.new_session(request, owned)
+        session = request['session']
+        if session not in owned:
+            raise KeyError(f'Unknown session {session!r}')
+        board = self.sessions[session]
+        match op:
+            case 'select':
+                board.select(*self.cell(board, request))
+                return {'selection': board.selection}
+            case 'enter':
+                if 'row' in request:
+                    board.select(*self.cell(board, request))
+                if board.selection is None:
+                    raise ValueError('No editable cell selected')
+                value = _integer(request, 'value')
+                if not 0 <= value <= board.size:
+                    raise ValueError(f'Value out of range: {value}')
+                board.set_current(value)
+                return {'value': value,
+                        'conflicting': board.is_conflicting(*board.selection),
+                        'solved': board.is_solved()}
+            case 'reset':
+                board.reset_to_original()
+                return self.state(board)
+            case 'state':
+                return self.state(board)
+            case 'close':
+                owned.discard(session)
+                del self.sessions[session]
+                return {}
+        raise ValueError(f'Unknown op {op!r}')
+
+    async def new_session(self, request: dict[str, Any],
+                          owned: set[int]) -> dict[str, Any]:
+        """Generates a puzzle on the pool and opens a session playing it."""
+        size = _integer(request, 'size', 9)
+        if size not in (4, 9, 16, 25):
+            raise ValueError(f'Unsupported size: {size}')
+        difficulty = request.get('difficulty', 'easy')
+        if not isinstance(difficulty, str):
+            raise TypeError(f'`difficulty` must be a string, not {difficulty!r}')
+        difficulty = Difficulty[difficulty.upper()]
+        removed = _integer(request, 'removed',
+                           round(difficulty.value * size*size / 81))
+        if not 0 <= removed <= size * size:
+            raise ValueError(f'Removed cells out of range: {removed}')
+        seed = _integer(request, 'seed', None)
+        loop = asyncio.get_running_loop()
+        try:
+            puzzle = await loop.run_in_executor(
+                self.pool, functools.partial(generate_sudoku, size, removed, seed=seed))
+        except Exception as error:
+            # e.g. a broken pool: fail this request, not the connection
+            raise RuntimeError(f'Generation failed: {error!r}') from error
+        session = next(self.ids)
+        self.sessions[session] = Board(size, puzzle=puzzle)
+        owned.add(session)
+        return {'session': session, 'puzzle': puzzle}
+
+    @staticmethod
+    def cell(board: Board, request: dict[str, Any]) -> tuple[int, int]:
+        """Returns the (row, col) of a request, checking that it is on `board`."""
+        row, col = _integer(request, 'row'), _integer(request, 'col')
+        if not (0 <= row < board.size and 0 <= col < board.size):
+            raise ValueError(f'Cell out of range: ({row}, {col})')
+        return row, col
+
+    @staticmethod
+    def state(board: Board) -> dict[str, Any]:
+        return {'values': board.data,
+                'selection': board.selection,
+                'solved': board.is_solved()}
+
+    async def serve(self, host: str = HOST, port: int = PORT,
+                    unix: Optional[str] = None) -> None:
+        """Serves on `host`:`port`, or on the unix socket `unix`, forever."""
+        if unix is not None:
+            server = await asyncio.start_unix_server(self.handle, unix)
+        else:
+            server = await asyncio.start_server(self.handle, host, port)
+        async with server:
+            await server.serve_forever()
+
+
+_REQUIRED = object()
+
+
+def _integer(request: dict[str, Any], name: str, default: Any = _REQUIRED) -> Any:
+    """Returns the integer field `name` of `request`, or `default` if it
+    is missing (if a default is given).
+
+    ### Raises:
+    - `KeyError` if the field is missing and has no default
+    - `TypeError` if the field is not an integer
+    """
+    if name not in request and default is not _REQUIRED:
+        return default
+    value = request[name]
+    if not isinstance(value, int) or isinstance(value, bool):
+        raise TypeError(f'`{name}` must be an integer, not {value!r}')
+    return value
+
+
+async def _request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                   request: dict[str, Any]) -> dict[str, Any]:
+    writer.write(json.dumps(request).encode() + b'\n')
+    await writer.drain()
+    response = json.loads(await reader.readline())
+    if not response['ok']:
+        raise RuntimeError(response['error'])
+    return response
+
+
+async def _play(connect, moves: int, difficulty: str, seed: int,
+                latencies: dict[str, list[float]]) -> None:
+    """Opens one connection, starts a game and makes `moves` random moves."""
+    rng = random.Random(seed)
+    reader, writer = await connect()
+    try:
+        start = time.perf_counter()
+        game = await _request(reader, writer, {'op': 'new', 'difficulty': difficulty,
+                                               'seed': seed})
+        latencies['new'].append(time.perf_counter() - start)
+        size = len(game['puzzle'])
+        empty = [(i, j) for i, row in enumerate(game['puzzle'])
+                        for j, val in enumerate(row) if not val]
+        for _ in range(moves):
+            row, col = rng.choice(empty)
+            start = time.perf_counter()
+            await _request(reader, writer, {'op': 'enter', 'session': game['session'],
+                                            'row': row, 'col': col,
+                                            'value': rng.randint(0, size)})
+            latencies['move'].append(time.perf_counter() - start)
+    finally:
+        writer.close()
+
+
+async def load(sessions: int, moves: int, difficulty: str = 'easy',
+               host: str = HOST, port: int = PORT,
+               unix: Optional[str] = None) -> None:
+    """Plays `sessions` concurrent games of `moves` moves each against a
+    running server and prints the throughput and request latencies.
+    """
+    if unix is not None:
+        connect = functools.partial(asyncio.open_unix_connection, unix)
+    else:
+        connect = functools.partial(asyncio.open_connection, host, port)
+    latencies: dict[str, list[float]] = {'new': [], 'move': []}
+    start = time.perf_counter()
+    await asyncio.gather(*(_play(connect, moves, difficulty, seed, latencies)
+                           for seed in range(sessions)))
+    elapsed = time.perf_counter() - start
+    print(f'{sessions} sessions, {len(latencies["move"])} moves in {elapsed:.2f} s '
+          f'({sessions/elapsed:.0f} sessions/s, '
+          f'{len(latencies["move"])/elapsed:.0f} moves/s)')
+    for name, samples in latencies.items():
+        if not samples:
+            continue
+        samples.sort()
+        p50 = samples[len(samples) // 2]
+        p99 = samples[min(len(samples) - 1, len(samples) * 99 // 100)]
+        print(f'{name:<5} latency p50 {p50*1000:8.2f} ms   p99 {p99*1000:8.2f} ms')
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Sudoku game server.')
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--unix', metavar='PATH',
+                        help='use a unix socket instead of TCP')
+    commands = parser.add_subparsers(dest='command', required=True)
+    serve = commands.add_parser('serve', help='run the server')
+    serve.add_argument('--workers', type=int,
+                       help='generation processes (default: all cores)')
+    client = commands.add_parser('load', help='load test a running server')
+    client.add_argument('--sessions', type=int, default=100)
+    client.add_argument('--moves', type=int, default=100)
+    client.add_argument('--difficulty', default='easy',
+                        choices=[d.name.lower() for d in Difficulty])
+    args = parser.parse_args()
+    if args.command == 'serve':
+        asyncio.run(GameServer(args.workers).serve(args.host, args.port, args.unix))
+    else:
+        asyncio.run(load(args.sessions, args.moves, args.difficulty,
+                         args.host, args.port, args.unix))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+import importlib.abc
+import importlib.machinery
+import sys
+import time
+from typing import Optional, Sequence
+
+"""
+Measures where startup time goes, for `python3 sudoku.py --profile-startup`.
+
+`StartupProfile.install()` puts a finder in front of `sys.meta_path` that
+wraps every module loader found afterwards, timing each module's own
+import (its body, minus the imports it triggers). `phase(name)` records
+a milestone such as the display opening or the first frame drawn.
+"""
+
+
+class _TimedLoader(importlib.abc.Loader):
+    def __init__(self, loader: importlib.abc.Loader,
+                 profile: 'StartupProfile') -> None:
+        self.loader = loader
+        self.profile = profile
+
+    def __getattr__(self, name: str):
+        return getattr(self.loader, name)
+
+    def create_module(self, spec: importlib.machinery.ModuleSpec):
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module) -> None:
+        profile = self.profile
+        profile.stack.append(0.0)
+        start = time.perf_counter()
+        try:
+            self.loader.exec_module(module)
+        finally:
+            elapsed = time.perf_counter() - start
+            children = profile.stack.pop()
+            if profile.stack:
+                profile.stack[-1] += elapsed
+            profile.modules[module.__name__] = elapsed - children
+
+
+class StartupProfile(importlib.abc.MetaPathFinder):
+    def __init__(self) -> None:
+        """Starts the clock; call `install` to begin timing imports."""
+        self.start = time.perf_counter()
+        self.modules: dict[str, float] = {}
+        self.phases: list[tuple[str, float]] = []
+        self.stack: list[float] = []
+
+    def install(self) -> 'StartupProfile':
+        sys.meta_path.insert(0, self)
+        return self
+
+    def uninstall(self) -> None:
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    def find_spec(self, fullname: str, path: Optional[Sequence[str]],
+                  target=None) -> Optional[importlib.machinery.ModuleSpec]:
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, 'find_spec'):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, 'exec_module'):
+                    spec.loader = _TimedLoader(spec.loader, self)
+                return spec
+        return None
+
+    def phase(self, name: str) -> None:
+        """Records that the `name` milestone was reached now."""
+        self.phases.append((name, time.perf_counter() - self.start))
+
+    def report(self, top: int = 15) -> str:
+        """Returns the phases and the `top` slowest modules as text."""
+        lines = ['startup profile (ms)']
+        last = 0.0
+        for name, at in self.phases:
+            lines.append(f'  {name:<28} {at*1000:8.1f}  (+{(at - last)*1000:.1f})')
+            last = at
+        total = sum(self.modules.values())
+        label = f'imports ({len(self.modules)} modules)'
+        lines.append(f'  {label:<28} {total*1000:8.1f}')
+        for name, elapsed in sorted(self.modules.items(),
+                                    key=lambda item: -item[1])[:top]:
+            lines.append(f'    {name:<30} {elapsed*1000:8.1f}')
+        return '\n'.join(lines)
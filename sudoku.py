@@ -1,34 +1,83 @@
+import sys
+
+if '--profile-startup' in sys.argv:
+    from startup_profile import StartupProfile
+    PROFILE = StartupProfile().install()
+else:
+    PROFILE = None
+
 import pygame
 from pygame.event import Event
 from typing import Optional
 
+import assets
 from board import Board
+from board_view import BoardView
 from button import Button
 from consts import *
-from assets import *
-
-
-WIN = pygame.display.set_mode((WIDTH, TOTAL_HEIGHT))
-pygame.display.set_caption('Sudoku')
+from engine import Engine
+from frame_policy import FramePolicy
+from puzzle_bank import PuzzleBank
 
 
 class Game:
-    def __init__(self) -> None:
-        """Instantiates the `Game` in the starting state."""
-        self.difficulty = None
-        self.board = None
-        self.state = State.START
+    def __init__(self, window: pygame.Surface,
+                 event_driven: bool = True,
+                 bank: Optional[PuzzleBank] = None) -> None:
+        """Instantiates the `Game` in the starting state.
+        The rules live in an `Engine`; the game feeds it pygame events
+        and renders it on `window`.
+
+        ### Parameters:
+        - `window` is the display surface to draw on
+        - `event_driven` makes each tick sleep until input arrives (see
+        `FramePolicy`) instead of polling at a fixed `FPS`
+        - `bank` supplies the puzzles (generated on demand if `None`);
+        it is topped up once the first frame is on screen
+        """
+        self.window = window
+        self.bank = bank
+        if bank is None:
+            self.engine = Engine()
+        else:
+            self.engine = Engine(puzzle_source=lambda size, removed:
+                                 bank.draw(size, removed)[0])
+        self.view = None
         self.clock = pygame.time.Clock()
+        self.frames = FramePolicy() if event_driven else None
+        self.redraw = True
+        self.refill_pending = bank is not None
+
+    def refill_bank(self) -> None:
+        """Starts refilling the bank buckets that are running low."""
+        for difficulty in Difficulty:
+            if self.bank.count(9, difficulty.value) < self.bank.low_water:
+                self.bank.refill(9, difficulty.value)
+
+    @property
+    def state(self) -> State:
+        return self.engine.state
+
+    @property
+    def board(self) -> Optional[Board]:
+        return self.engine.board
 
     def tick(self) -> bool:
-        """Performs the drawing and logic for one game tick.
+        """Performs the drawing and logic for one game tick, rendering
+        only if an event arrived or the window needs a full redraw.
         Returns a boolean representing if the game loop should continue.
         """
-        self.clock.tick(FPS)
-        WIN.fill(WHITE)
-        events = pygame.event.get()
+        if self.frames is not None:
+            events = self.frames.wait()
+        else:
+            self.clock.tick(FPS)
+            events = pygame.event.get()
         if pygame.QUIT in (event.type for event in events):
             return False
+        if any(event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED)
+               for event in events):
+            self.redraw = True
+        state = self.state
         loop = True
         match self.state:
             case State.START:  # starting menu/screen
@@ -39,75 +88,117 @@ class Game:
                 loop = self.tick_game_over_screen(events)
             case _:
                 raise Exception(f'Invalid state: {self.state!r}')
-        pygame.display.update()
+        if self.state != state:
+            self.redraw = True
+        if loop and (events or self.redraw):
+            self.render()
+            if self.frames is not None:
+                # caps the frame rate during bursts of input
+                self.clock.tick(self.frames.fps)
         return loop
 
-    def draw_start_screen(self) -> None:
-        WIN.blit(WELCOME, WELCOME_RECT)
-        WIN.blit(DIFFICULTY_LABLE, DIFFICULTY_LABLE_RECT)
-        EASY_BTN.draw(WIN)
-        MEDIUM_BTN.draw(WIN)
-        HARD_BTN.draw(WIN)
+    def render(self) -> None:
+        """Redraws the whole window after a screen change, otherwise
+        only what changed, and pushes just the changed rects to the display.
+        """
+        if self.board is not None and (self.view is None
+                                       or self.view.board is not self.board):
+            self.view = BoardView(self.board)
+            self.redraw = True
+        full = self.redraw
+        self.redraw = False
+        if full:
+            self.window.fill(WHITE)
+        match self.state:
+            case State.START:
+                rects = self.draw_start_screen(full)
+            case State.ACTIVE:
+                rects = self.draw_active_screen(full)
+            case State.WON:
+                rects = self.draw_game_over_screen(full)
+        if full:
+            pygame.display.update()
+        elif rects:
+            pygame.display.update(rects)
+        if self.refill_pending:
+            # deferred so that the generation doesn't delay the first frame
+            self.refill_pending = False
+            self.refill_bank()
+
+    def draw_buttons(self, buttons: tuple[Button, ...],
+                     full: bool) -> list[pygame.Rect]:
+        return [button.draw(self.window) for button in buttons
+                if full or button.dirty]
+
+    def draw_start_screen(self, full: bool = True) -> list[pygame.Rect]:
+        if full:
+            self.window.blit(assets.WELCOME, assets.WELCOME_RECT)
+            self.window.blit(assets.DIFFICULTY_LABLE, assets.DIFFICULTY_LABLE_RECT)
+        return self.draw_buttons(
+            (assets.EASY_BTN, assets.MEDIUM_BTN, assets.HARD_BTN), full)
 
     def tick_start_screen(self, events: list[Event]) -> None:
-        self.draw_start_screen()
+        difficulties = {
+            assets.EASY_BTN: Difficulty.EASY,
+            assets.MEDIUM_BTN: Difficulty.MEDIUM,
+            assets.HARD_BTN: Difficulty.HARD,
+        }
         difficulty = None
         for event in events:
             if event.type != pygame.MOUSEBUTTONDOWN:
                 continue
             x, y = event.dict['pos']
-            if EASY_BTN.click(x, y):
-                difficulty = Difficulty.EASY
-            if MEDIUM_BTN.click(x, y):
-                difficulty = Difficulty.MEDIUM
-            if HARD_BTN.click(x, y):
-                difficulty = Difficulty.HARD
+            button = assets.START_BUTTONS.hit(x, y)
+            if button is not None:
+                difficulty = difficulties[button]
         if difficulty is not None:
-            self.state = State.ACTIVE
-            self.board = Board(removed=difficulty.value)
+            self.engine.start(difficulty)
 
-    def draw_active_screen(self) -> None:
-        self.board.draw(WIN)
-        RESET_BTN.draw(WIN)
-        RESTART_BTN.draw(WIN)
-        EXIT_BTN.draw(WIN)
+    def draw_active_screen(self, full: bool = True) -> list[pygame.Rect]:
+        return self.view.draw(self.window, full)\
+            + self.draw_buttons(
+                (assets.RESET_BTN, assets.RESTART_BTN, assets.EXIT_BTN), full)
 
     def tick_active_screen(self, events: list[Event]) -> bool:
-        self.draw_active_screen()
         for event in events:
             if event.type == pygame.MOUSEBUTTONDOWN:
                 x, y = event.dict['pos']
-                if EXIT_BTN.click(x, y):
+                button = assets.ACTIVE_BUTTONS.hit(x, y)
+                if button is assets.EXIT_BTN:
                     return False
-                if RESET_BTN.click(x, y):
-                    self.board.reset_to_original()
-                if RESTART_BTN.click(x, y):
-                    self.state = State.START
+                if button is assets.RESET_BTN:
+                    self.engine.reset()
+                if button is assets.RESTART_BTN:
+                    self.engine.restart()
                 idx = self.board.click(x, y)
                 if idx is None:
                     continue
-                self.board.select(*idx)
+                self.engine.select(*idx)
             elif event.type == pygame.KEYDOWN:
                 key = event.dict['unicode']
-                if key in VALID_NUMS and self.board.selection is not None:
-                    row, col = self.board.selection
-                    if self.board.initial_state[row][col] == 0:
-                        self.board.set_current(int(key))
-                        if self.board.is_solved():
-                            self.state = State.WON
+                if key in VALID_NUMS:
+                    self.engine.enter(int(key))
+                elif key == '\x1a':  # ctrl+z
+                    self.engine.undo()
+                elif key == '\x19':  # ctrl+y
+                    self.engine.redo()
+                elif key == 'h':  # selects the next cell that can be deduced
+                    hint = self.engine.hint()
+                    if hint is not None:
+                        self.engine.select(hint.row, hint.col)
         return True
     
-    def draw_game_over_screen(self) -> None:
-        WIN.blit(WON, WON_RECT)
-        FINAL_EXIT_BTN.draw(WIN)
+    def draw_game_over_screen(self, full: bool = True) -> list[pygame.Rect]:
+        if full:
+            self.window.blit(assets.WON, assets.WON_RECT)
+        return self.draw_buttons((assets.FINAL_EXIT_BTN,), full)
 
     def tick_game_over_screen(self, events: list[Event]) -> bool:
-        self.draw_game_over_screen()
         for event in events:
             if event.type != pygame.MOUSEBUTTONDOWN:
                 continue
             x, y = event.dict['pos']
-            if FINAL_EXIT_BTN.click(x, y):
+            if assets.WON_BUTTONS.hit(x, y) is assets.FINAL_EXIT_BTN:
                 return False
         return True
 
@@ -117,8 +208,34 @@ class Game:
 
 
 def main() -> None:
-    Game().run()
+    """Usage: `python3 sudoku.py [--poll] [--profile-startup]`
+    `--poll` redraws at a fixed `FPS` instead of waiting for events.
+    """
+    window = pygame.display.set_mode((WIDTH, TOTAL_HEIGHT))
+    pygame.display.set_caption('Sudoku')
+    # nothing reacts to mouse motion, so don't wake up for it
+    pygame.event.set_blocked(pygame.MOUSEMOTION)
+    event_driven = '--poll' not in sys.argv
+    # refills generate in another process, away from the render loop
+    bank = PuzzleBank(processes=1)
+    try:
+        if PROFILE is None:
+            Game(window, event_driven, bank).run()
+            return
+        PROFILE.phase('display opened')
+        game = Game(window, event_driven, bank)
+        PROFILE.phase('game created')
+        game.render()
+        PROFILE.phase('first frame')
+        PROFILE.uninstall()
+        print(PROFILE.report())
+        game.run()
+    finally:
+        # don't wait for queued refills on the way out
+        bank.close()
 
 
 if __name__ == '__main__':
+    if PROFILE is not None:
+        PROFILE.phase('imports')
     main()
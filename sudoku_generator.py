@@ -1,6 +1,12 @@
+import contextlib
+import functools
+import itertools
+import json
 import math
+import os
 import random
-from typing import Iterable, Iterator
+import time
+from typing import Any, Callable, Iterable, Iterator, NamedTuple, Optional
 
 """
 This was adapted from a GeeksforGeeks article "Program for Sudoku Generator" by Aarti_Rathi and Ankur Trisal
@@ -14,8 +20,253 @@ def flatten(__data: Iterable[Iterable]) -> Iterator:
             yield val
 
 
+def iter_digits(__mask: int) -> Iterator[int]:
+    """Yields the digits whose bits are set in a
+    candidate mask, in increasing order.
+    """
+    while __mask:
+        bit = __mask & -__mask
+        __mask ^= bit
+        yield bit.bit_length()
+
+
+@functools.lru_cache(maxsize=None)
+def layout(n: int) -> tuple[tuple[tuple[int, ...], ...], tuple[tuple[int, ...], ...]]:
+    """Returns the peers of every cell and the cells of every
+    row, column and box of an n by n board, as flat indices.
+    Units are ordered rows, then columns, then boxes.
+    """
+    k = int(math.sqrt(n))
+    rows = [tuple(i*n + j for j in range(n)) for i in range(n)]
+    cols = [tuple(i*n + j for i in range(n)) for j in range(n)]
+    boxes = [tuple((i+a)*n + j+b for a in range(k) for b in range(k))
+             for i in range(0, n, k) for j in range(0, n, k)]
+    units = tuple(rows + cols + boxes)
+    peers = tuple(
+        tuple(sorted(set(rows[i//n] + cols[i%n]
+                         + boxes[i//n//k*k + i%n//k]) - {i}))
+        for i in range(n * n)
+    )
+    return peers, units
+
+
+def _candidates(grid: list[list[int]]) -> Optional[list[int]]:
+    """Returns the flat candidate masks of `grid` with every given
+    propagated, or `None` if the givens cannot be completed.
+    """
+    n = len(grid)
+    if not n or not math.sqrt(n).is_integer() or any(len(row) != n for row in grid):
+        raise ValueError('`grid` must be a square board with a perfect-square size.')
+    full = (1 << n) - 1
+    cand = []
+    for val in flatten(grid):
+        if not 0 <= val <= n:
+            raise ValueError(f'Cell value out of range: {val!r}')
+        cand.append(1 << (val - 1) if val else full)
+    queue = [i for i, val in enumerate(flatten(grid)) if val]
+    return cand if _propagate(cand, queue, n) else None
+
+
+def _propagate(cand: list[int], queue: list[int], n: int) -> bool:
+    """Eliminates the digits of the solved cells in `queue` from their
+    peers, then places hidden singles, until nothing changes.
+    Works in place on `cand`. Returns False on a contradiction.
+    """
+    peers, units = layout(n)
+    full = (1 << n) - 1
+    while queue:
+        while queue:
+            i = queue.pop()
+            bit = cand[i]
+            for p in peers[i]:
+                mask = cand[p]
+                if mask & bit:
+                    mask ^= bit
+                    if not mask:
+                        return False
+                    cand[p] = mask
+                    if not mask & (mask - 1):
+                        queue.append(p)
+        for unit in units:
+            once = twice = 0
+            for i in unit:
+                mask = cand[i]
+                twice |= once & mask
+                once |= mask
+            if once != full:
+                return False
+            hidden = once & ~twice
+            if not hidden:
+                continue
+            for i in unit:
+                mask = cand[i]
+                if mask & (mask - 1) and mask & hidden:
+                    mask &= hidden
+                    if mask & (mask - 1):
+                        return False
+                    cand[i] = mask
+                    queue.append(i)
+    return True
+
+
+def _search(cand: list[int], n: int, limit: int,
+            solutions: list[list[int]]) -> int:
+    """Counts the completions of the propagated masks `cand` (up to `limit`),
+    branching on the unsolved cell with the fewest candidates.
+    Solved mask lists are appended to `solutions`.
+    """
+    best = -1
+    best_count = n + 1
+    for i, mask in enumerate(cand):
+        if mask & (mask - 1):
+            count = mask.bit_count()
+            if count < best_count:
+                best, best_count = i, count
+                if count == 2:
+                    break
+    if best < 0:
+        solutions.append(cand)
+        return 1
+    found = 0
+    for num in iter_digits(cand[best]):
+        branch = cand.copy()
+        branch[best] = 1 << (num - 1)
+        if _propagate(branch, [best], n):
+            found += _search(branch, n, limit - found, solutions)
+            if found >= limit:
+                break
+    return found
+
+
+def solve(grid: list[list[int]]) -> Optional[list[list[int]]]:
+    """Solves a partially filled board (0 for empty cells) of any
+    perfect-square size, e.g. the output of `generate_sudoku`.
+    The search propagates naked and hidden singles over bitmask
+    candidates before branching. `grid` is left unchanged.
+
+    ### Return:
+    - `list[list[int]]` (a new, solved board),
+    or `None` if the board has no solution
+
+    ### Raises:
+    - `ValueError` if `grid` is not a valid board shape or holds out-of-range values
+    """
+    return solve_count(grid, 1)[0]
+
+
+def count_solutions(grid: list[list[int]], limit: int = 2) -> int:
+    """Counts the solutions of a partially filled board, stopping
+    once `limit` have been found. Use `limit=2` to check that a
+    puzzle is uniquely solvable. `grid` is left unchanged.
+
+    ### Raises:
+    - `ValueError` if `grid` is not a valid board shape or holds out-of-range values
+    """
+    return solve_count(grid, limit)[1]
+
+
+def solve_count(grid: list[list[int]],
+                limit: int = 2) -> tuple[Optional[list[list[int]]], int]:
+    """Solves a partially filled board and counts its solutions (up to
+    `limit`) in one search, so validating a puzzle does not search twice.
+    `grid` is left unchanged.
+
+    ### Return:
+    - `tuple[Optional[list[list[int]]], int]` (the first solution found,
+    or `None` if there is none, and the solution count; with the default
+    `limit=2`, a count of 1 means the puzzle is uniquely solvable)
+
+    ### Raises:
+    - `ValueError` if `grid` is not a valid board shape or holds out-of-range values
+    """
+    n = len(grid)
+    cand = _candidates(grid)
+    if cand is None:
+        return None, 0
+    solutions: list[list[int]] = []
+    count = _search(cand, n, limit, solutions)
+    if not count:
+        return None, 0
+    flat = [mask.bit_length() for mask in solutions[0]]
+    return [flat[i:i+n] for i in range(0, n * n, n)], count
+
+
+class FillReport(NamedTuple):
+    """Outcome of a budgeted fill (see `SudokuGenerator.fill_values_mrv`).
+    - `solved`   - whether the board was completely filled
+    - `steps`    - number of branching decisions taken across all attempts
+    - `restarts` - number of times the search was restarted from scratch
+    - `elapsed`  - wall time spent, in seconds
+    """
+    solved: bool
+    steps: int
+    restarts: int
+    elapsed: float
+
+
+class GenerationStats:
+    def __init__(self, log: Optional[str] = None) -> None:
+        """Collects what one generation did, when passed as `stats=`
+        to `generate_puzzle` (see `SudokuGenerator.instrument`):
+        - `self.nodes`             - search nodes visited (`FillSearch`
+        placements, `fill_remaining` calls, or branching steps of
+        `fill_values_mrv`)
+        - `self.backtracks`        - nodes that failed (cells `FillSearch`
+        ran out of candidates for, `fill_remaining` returning False, or
+        contradictions met by `fill_values_mrv`)
+        - `self.restarts`          - times `fill_values_mrv` started over
+        - `self.validity_checks`   - `is_valid`/`candidates` calls
+        - `self.uniqueness_checks` - `count_solutions` calls while removing
+        - `self.max_depth`         - most cells filled by the search at once
+        - `self.phases`            - seconds spent in each phase
+        - `self.context`           - the arguments of the generation
+
+        ### Parameters:
+        - `log` is a JSON-lines file each finished generation is appended to
+        """
+        self.log = log
+        self.nodes = 0
+        self.backtracks = 0
+        self.restarts = 0
+        self.validity_checks = 0
+        self.uniqueness_checks = 0
+        self.depth = 0
+        self.max_depth = 0
+        self.phases: dict[str, float] = {}
+        self.context: dict[str, Any] = {}
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Adds the wall time spent inside the `with` block to `phases[name]`."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0)\
+                + time.perf_counter() - start
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            **self.context,
+            'nodes': self.nodes,
+            'backtracks': self.backtracks,
+            'restarts': self.restarts,
+            'validity_checks': self.validity_checks,
+            'uniqueness_checks': self.uniqueness_checks,
+            'max_depth': self.max_depth,
+            'phases': self.phases,
+        }
+
+    def flush(self) -> None:
+        """Appends the stats as one JSON line to `log`, if set."""
+        if self.log is not None:
+            with open(self.log, 'a') as file:
+                file.write(json.dumps(self.as_dict()) + '\n')
+
+
 class SudokuGenerator:
-    def __init__(self, row_length: int = 9, removed_cells: int = 0) -> None:
+    def __init__(self, row_length: int = 9, removed_cells: int = 0,
+                 seed: Optional[int] = None) -> None:
         """create a sudoku board - initialize class variables
         and set up the 2D board.
         This should initialize:
@@ -23,10 +274,18 @@ class SudokuGenerator:
         - `self.removed_cells`	- the total number of cells to be removed
         - `self.board`			- a 2D list of ints to represent the board
         - `self.box_length`		- the square root of row_length
+        - `self.row_masks`		- bitmask of the digits used in each row
+        - `self.col_masks`		- bitmask of the digits used in each column
+        - `self.box_masks`		- bitmask of the digits used in each box
+        - `self.rng`			- the source of randomness for filling and removing
+
+        Digit `num` is stored as bit `num - 1` of a mask.
 
         ### Parameters:
         - `row_length` - is the number of rows/columns of the board (always 9 for this project)
         - `removed_cells` - is an integer value - the number of cells to be removed
+        - `seed` - makes the generated board reproducible
+        (the global `random` module is used if `None`)
         """
         self.row_length = row_length
         self.removed_cells = min(removed_cells, row_length**2)
@@ -36,6 +295,67 @@ class SudokuGenerator:
         self.box_length = int(box_length)
         self.board = [[0 for _ in range(row_length)]
                          for _ in range(row_length)]
+        self.full_mask = (1 << row_length) - 1
+        self.row_masks = [0] * row_length
+        self.col_masks = [0] * row_length
+        self.box_masks = [0] * row_length
+        self.rng = random if seed is None else random.Random(seed)
+        self._units = None
+
+    def instrument(self, stats: GenerationStats) -> None:
+        """Counts the work of this generator into `stats` by shadowing the
+        counted methods with wrappers on this instance only, so generators
+        that are not instrumented run the plain methods at full speed.
+        """
+        fill_remaining = self.fill_remaining
+        fill_attempt = self._fill_attempt
+        propagate = self.propagate
+        is_valid = self.is_valid
+        candidates = self.candidates
+        count_solutions = self.count_solutions
+
+        def counted_fill_remaining(row: int, col: int) -> bool:
+            stats.nodes += 1
+            stats.depth += 1
+            stats.max_depth = max(stats.max_depth, stats.depth)
+            try:
+                solved = fill_remaining(row, col)
+            finally:
+                stats.depth -= 1
+            if not solved:
+                stats.backtracks += 1
+            return solved
+
+        def counted_fill_attempt(*args) -> tuple[Optional[bool], int, int]:
+            solved, steps, depth = fill_attempt(*args)
+            stats.nodes += steps
+            stats.max_depth = max(stats.max_depth, depth)
+            return solved, steps, depth
+
+        def counted_propagate(*args) -> Optional[tuple[int, int, int]]:
+            found = propagate(*args)
+            if found is not None and not found[2]:
+                stats.backtracks += 1
+            return found
+
+        def counted_is_valid(row: int, col: int, num: int) -> bool:
+            stats.validity_checks += 1
+            return is_valid(row, col, num)
+
+        def counted_candidates(row: int, col: int) -> int:
+            stats.validity_checks += 1
+            return candidates(row, col)
+
+        def counted_count_solutions(limit: int = 2) -> int:
+            stats.uniqueness_checks += 1
+            return count_solutions(limit)
+
+        self.fill_remaining = counted_fill_remaining
+        self._fill_attempt = counted_fill_attempt
+        self.propagate = counted_propagate
+        self.is_valid = counted_is_valid
+        self.candidates = counted_candidates
+        self.count_solutions = counted_count_solutions
 
     def get_board(self) -> list[list[int]]:
         """Returns a 2D python list of numbers which represents the board.
@@ -56,6 +376,13 @@ class SudokuGenerator:
         return (row - row%self.box_length,
                 col - col%self.box_length)
 
+    def box_index(self, row: int, col: int) -> int:
+        """Returns the index (row-major, from 0) of the box
+        that the cell with index (row, col) is in.
+        """
+        return row // self.box_length * self.box_length\
+             + col // self.box_length
+
     def box(self, row: int, col: int) -> list[list[int]]:
         """Returns the box that the cell with index (row, col) is in."""
         row_start, col_start = self.box_start(row, col)
@@ -72,7 +399,7 @@ class SudokuGenerator:
         - `row` is the index of the row we are checking
         - `num` is the value we are looking for in the row
         """
-        return num not in self.board[row]
+        return not self.row_masks[row] >> (num - 1) & 1
 
     def valid_in_col(self, col: int, num: int) -> bool:
         """Determines if num is contained in the specified column
@@ -83,7 +410,7 @@ class SudokuGenerator:
         - `col` is the index of the column we are checking
         - `num` is the value we are looking for in the column
         """
-        return num not in tuple(zip(*self.board))[col]
+        return not self.col_masks[col] >> (num - 1) & 1
 
     def valid_in_box(self, row: int, col: int, num: int) -> bool:
         """Determines if num is contained in the 3x3 box specified on the board
@@ -94,8 +421,8 @@ class SudokuGenerator:
         - `row` and `col` are the indices of a cell in the box to check
         - `num` is the value we are looking for in the box
         """
-        return num not in flatten(self.box(row, col))
-    
+        return not self.box_masks[self.box_index(row, col)] >> (num - 1) & 1
+
     def is_valid(self, row: int, col: int, num: int) -> bool:
         """Determines if it is valid to enter num at (row, col) in the board
         This is done by checking that num is unused in the appropriate, row, column, and box
@@ -104,10 +431,44 @@ class SudokuGenerator:
         row and col are the row index and col index of the cell to check in the board
         num is the value to test if it is safe to enter in this cell
         """
-        box_row, box_col = self.box_start(row, col)
-        return self.valid_in_row(row, num)\
-           and self.valid_in_col(col, num)\
-           and self.valid_in_box(box_row, box_col, num)
+        return not self.used(row, col) >> (num - 1) & 1
+
+    def used(self, row: int, col: int) -> int:
+        """Returns the bitmask of digits already used in the
+        row, column or box of the cell at (row, col).
+        """
+        return self.row_masks[row]\
+             | self.col_masks[col]\
+             | self.box_masks[self.box_index(row, col)]
+
+    def candidates(self, row: int, col: int) -> int:
+        """Returns the bitmask of digits that can still be
+        entered at (row, col). Use `iter_digits` to walk it.
+        """
+        return ~self.used(row, col) & self.full_mask
+
+    def place(self, row: int, col: int, num: int) -> None:
+        """Enters num at (row, col) and marks it as used in
+        the cell's row, column and box. The cell must be empty.
+        """
+        bit = 1 << (num - 1)
+        self.board[row][col] = num
+        self.row_masks[row] |= bit
+        self.col_masks[col] |= bit
+        self.box_masks[self.box_index(row, col)] |= bit
+
+    def unplace(self, row: int, col: int) -> None:
+        """Clears (row, col) and releases its digit in
+        the cell's row, column and box masks.
+        """
+        num = self.board[row][col]
+        if not num:
+            return
+        bit = ~(1 << (num - 1))
+        self.board[row][col] = 0
+        self.row_masks[row] &= bit
+        self.col_masks[col] &= bit
+        self.box_masks[self.box_index(row, col)] &= bit
 
     def fill_box(self, row_start: int, col_start: int) -> None:
         """Fills the specified 3x3 box with values.
@@ -120,11 +481,11 @@ class SudokuGenerator:
         """
         n = self.box_length
         arr = list(range(1, self.row_length+1))
-        random.shuffle(arr)
+        self.rng.shuffle(arr)
         for i in range(n):
             for j in range(n):
-                self.board[i+row_start][j+col_start] = arr.pop()
-    
+                self.place(i+row_start, j+col_start, arr.pop())
+
     def fill_diagonal(self) -> None:
         """Fills the three boxes along the main diagonal of the board
         These are the boxes which start at (0,0), (3,3), and (6,6)
@@ -133,9 +494,10 @@ class SudokuGenerator:
             self.fill_box(i, i)
 
     def fill_remaining(self, row: int, col: int) -> bool:
-        """DO NOT CHANGE!
-        Fills the remaining cells of the board
+        """Fills the remaining cells of the board
         Should be called after the diagonal boxes have been filled
+        Candidates are taken from the row/column/box bitmasks
+        in increasing order, lowest bit first.
         
         ### Parameters:
         - `row`, `col` specify the coordinates of the first empty (0) cell
@@ -161,12 +523,14 @@ class SudokuGenerator:
                 if row >= self.row_length:
                     return True
         
-        for num in range(1, self.row_length + 1):
-            if self.is_valid(row, col, num):
-                self.board[row][col] = num
-                if self.fill_remaining(row, col + 1):
-                    return True
-                self.board[row][col] = 0
+        avail = self.candidates(row, col)
+        while avail:
+            bit = avail & -avail
+            avail ^= bit
+            self.place(row, col, bit.bit_length())
+            if self.fill_remaining(row, col + 1):
+                return True
+            self.unplace(row, col)
         return False
 
     def fill_values(self) -> None:
@@ -177,6 +541,232 @@ class SudokuGenerator:
         self.fill_diagonal()
         self.fill_remaining(0, self.box_length)
 
+    def fill_values_iterative(self) -> None:
+        """Constructs the same solution as `fill_values`, using a `FillSearch`
+        (an explicit stack) instead of one recursive call per cell.
+        """
+        self.fill_diagonal()
+        FillSearch(self).run()
+
+    def clear(self) -> None:
+        """Empties every cell of the board and resets the digit masks."""
+        for row in self.board:
+            row[:] = [0] * self.row_length
+        self.row_masks = [0] * self.row_length
+        self.col_masks = [0] * self.row_length
+        self.box_masks = [0] * self.row_length
+
+    def propagate(self, cells: list[tuple[int, int]],
+                  trail: list[tuple[int, int]]) -> Optional[tuple[int, int, int]]:
+        """Repeatedly places every empty cell of `cells` that has a single
+        candidate (naked singles) and every digit that fits in only one
+        cell of a row, column or box (hidden singles), recording each
+        placement on `trail`. Then picks the empty cell with the fewest
+        candidates (MRV).
+
+        ### Return:
+        - `None` if every cell is filled
+        - `(row, col, mask)` of the MRV cell otherwise,
+        where an empty `mask` means the board is contradictory
+        """
+        board = self.board
+        masks = [[0] * self.row_length for _ in range(self.row_length)]
+        while True:
+            forced = False
+            best = None
+            best_count = self.row_length + 1
+            for row, col in cells:
+                if board[row][col]:
+                    continue
+                mask = masks[row][col] = self.candidates(row, col)
+                count = mask.bit_count()
+                if count == 0:
+                    return (row, col, 0)
+                if count == 1:
+                    self.place(row, col, mask.bit_length())
+                    trail.append((row, col))
+                    forced = True
+                elif count < best_count:
+                    best = (row, col, mask)
+                    best_count = count
+            if forced:
+                continue
+            if best is None:
+                return None
+            forced = self.place_hidden_singles(masks, trail)
+            if forced is None:
+                return (best[0], best[1], 0)
+            if not forced:
+                return best
+
+    def units(self) -> list[list[tuple[int, int]]]:
+        """Returns the cells of every row, column and box of the board."""
+        n, k = self.row_length, self.box_length
+        rows = [[(i, j) for j in range(n)] for i in range(n)]
+        cols = [[(i, j) for i in range(n)] for j in range(n)]
+        boxes = [[(i + a, j + b) for a in range(k) for b in range(k)]
+                 for i in range(0, n, k) for j in range(0, n, k)]
+        return rows + cols + boxes
+
+    def place_hidden_singles(self, masks: list[list[int]],
+                             trail: list[tuple[int, int]]) -> Optional[bool]:
+        """Places every digit that can only go in one cell of some
+        row, column or box, recording each placement on `trail`.
+
+        ### Parameters:
+        - `masks` holds the current candidates of every empty cell
+
+        ### Return:
+        - whether any digit was placed,
+        or `None` if some digit no longer fits anywhere in a unit
+        """
+        if self._units is None:
+            self._units = self.units()
+        board = self.board
+        placed = False
+        for unit in self._units:
+            once = twice = filled = 0
+            for row, col in unit:
+                num = board[row][col]
+                if num:
+                    filled |= 1 << (num - 1)
+                    continue
+                mask = masks[row][col]
+                twice |= once & mask
+                once |= mask
+            if (once | filled) != self.full_mask:
+                return None
+            hidden = once & ~twice & ~filled
+            if not hidden:
+                continue
+            for row, col in unit:
+                if board[row][col] or not masks[row][col] & hidden:
+                    continue
+                mask = self.candidates(row, col) & hidden
+                if mask & (mask - 1):
+                    return None
+                if mask:
+                    self.place(row, col, mask.bit_length())
+                    trail.append((row, col))
+                    placed = True
+        return placed
+
+    def _fill_attempt(self, step_limit: int,
+                      deadline: Optional[float]) -> tuple[Optional[bool], int, int]:
+        """Runs one randomized MRV search with singles propagation,
+        stopping after `step_limit` branching steps or at `deadline`.
+
+        ### Return:
+        - `(True, steps, depth)` if the board was filled
+        - `(False, steps, depth)` if the pre-filled cells cannot be completed
+        - `(None, steps, depth)` if the budget ran out first
+
+        where `depth` is the most cells the search had filled at once
+        """
+        cells = [(i, j) for i in range(self.row_length)
+                        for j in range(self.row_length)]
+        self.rng.shuffle(cells)
+        trail: list[tuple[int, int]] = []
+        stack: list[tuple[int, int, list[int], int]] = []
+        steps = 0
+        depth = 0
+        while True:
+            found = self.propagate(cells, trail)
+            depth = max(depth, len(trail))
+            if found is None:
+                return True, steps, depth
+            row, col, mask = found
+            if mask:
+                digits = list(iter_digits(mask))
+                self.rng.shuffle(digits)
+                stack.append((row, col, digits, len(trail)))
+            while True:
+                if not stack:
+                    return False, steps, depth
+                row, col, digits, mark = stack[-1]
+                while len(trail) > mark:
+                    self.unplace(*trail.pop())
+                if not digits:
+                    stack.pop()
+                    continue
+                if steps >= step_limit or (deadline is not None
+                                           and time.perf_counter() > deadline):
+                    return None, steps, depth
+                steps += 1
+                self.place(row, col, digits.pop())
+                trail.append((row, col))
+                break
+
+    def fill_values_mrv(self, max_steps: Optional[int] = None,
+                        timeout: Optional[float] = None) -> FillReport:
+        """Constructs a solution with a budgeted search suited to large boards.
+        Each attempt pre-fills the diagonal boxes and completes the board
+        with minimum-remaining-values ordering and naked singles propagation.
+        Attempts that stall or dead-end are abandoned and restarted
+        with a fresh random fill and a doubled step allowance.
+
+        ### Parameters:
+        - `max_steps` - total number of branching steps allowed (unbounded if `None`)
+        - `timeout` - wall time allowed in seconds (unbounded if `None`)
+
+        ### Return:
+        - `FillReport` (the board is left empty if `solved` is False)
+        """
+        start = time.perf_counter()
+        deadline = None if timeout is None else start + timeout
+        step_limit = 2 * self.row_length**2
+        steps = 0
+        restarts = 0
+        while True:
+            remaining = step_limit if max_steps is None\
+                else min(step_limit, max_steps - steps)
+            self.clear()
+            self.fill_diagonal()
+            solved, taken, _ = self._fill_attempt(remaining, deadline)
+            steps += taken
+            out_of_budget = (max_steps is not None and steps >= max_steps)\
+                or (deadline is not None and time.perf_counter() > deadline)
+            if solved or out_of_budget:
+                break
+            restarts += 1
+            step_limit *= 2
+        if not solved:
+            self.clear()
+        return FillReport(bool(solved), steps, restarts,
+                          time.perf_counter() - start)
+
+    def count_solutions(self, limit: int = 2) -> int:
+        """Counts the ways the current board can be completed,
+        stopping early once `limit` solutions have been found.
+        """
+        return count_solutions(self.board, limit)
+
+    def remove_cells_unique(self) -> int:
+        """Removes up to `removed_cells` cells from a solved board,
+        one at a time and in random order, keeping only removals
+        after which the puzzle still has exactly one solution.
+
+        ### Return:
+        - `int` (the number of cells actually removed, which is lower than
+        `removed_cells` if no more cells could be cleared uniquely)
+        """
+        idxs = [(i, j) for i in range(self.row_length)
+                       for j in range(self.row_length)]
+        self.rng.shuffle(idxs)
+        removed = 0
+        for i, j in idxs:
+            if removed >= self.removed_cells:
+                break
+            num = self.board[i][j]
+            if not num:
+                continue
+            self.unplace(i, j)
+            if self.count_solutions(2) == 1:
+                removed += 1
+            else:
+                self.place(i, j, num)
+        return removed
+
     def remove_cells(self) -> None:
         """Removes the appropriate number of cells from the board
         This is done by setting some values to 0
@@ -189,31 +779,300 @@ class SudokuGenerator:
         """
         idxs = tuple((i, j) for i in range(self.row_length)
                             for j in range(self.row_length))
-        for i, j in random.sample(idxs, self.removed_cells):
-            self.board[i][j] = 0
+        for i, j in self.rng.sample(idxs, self.removed_cells):
+            self.unplace(i, j)
 
 
-def generate_sudoku(size: int = 9,
-                    removed: int = 0) -> list[list[int]]:
-    """DO NOT CHANGE!
-    Given a number of rows and number of cells to remove, this function:
+class FillSearch:
+    def __init__(self, sudoku: SudokuGenerator) -> None:
+        """Completes the board of `sudoku` after `fill_diagonal` exactly like
+        `fill_remaining` does (cells outside the diagonal boxes in row-major
+        order, candidates lowest first), but keeps the untried candidates
+        of every filled cell on an explicit stack instead of in Python frames.
+        That makes the search resumable: `run` can stop on a budget and
+        pick up where it left off, and `cancel` stops it from another thread.
+        - `self.steps`      - digits placed so far
+        - `self.backtracks` - cells whose candidates ran out
+        - `self.max_depth`  - the most cells filled at once
+        - `self.result`     - True/False once the search finished, else `None`
+        """
+        n, k = sudoku.row_length, sudoku.box_length
+        self.sudoku = sudoku
+        self.cells = [(i, j, i // k * k + j // k)
+                      for i in range(n) for j in range(n)
+                      if i // k != j // k]
+        self.stack: list[int] = []
+        self.steps = 0
+        self.backtracks = 0
+        self.max_depth = 0
+        self.result: Optional[bool] = None
+        self.cancelled = False
+
+    def cancel(self) -> None:
+        """Makes a running `run` return `None` within a few thousand steps.
+        The cells placed so far stay on the board.
+        """
+        self.cancelled = True
+
+    def run(self, max_steps: Optional[int] = None,
+            timeout: Optional[float] = None) -> Optional[bool]:
+        """Continues the search for up to `max_steps` more placements or
+        `timeout` seconds (unbounded if `None`).
+
+        ### Return:
+        - `True` if the board is filled
+        - `False` if the diagonal boxes cannot be completed
+        - `None` if the budget ran out or the search was cancelled
+        (call `run` again to resume)
+        """
+        if self.result is not None:
+            return self.result
+        sudoku = self.sudoku
+        board = sudoku.board
+        rows, cols, boxes = sudoku.row_masks, sudoku.col_masks, sudoku.box_masks
+        full = sudoku.full_mask
+        cells = self.cells
+        total = len(cells)
+        stack = self.stack
+        limit = None if max_steps is None else self.steps + max_steps
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        steps = self.steps
+        try:
+            while True:
+                depth = len(stack)
+                if depth == total:
+                    self.max_depth = total
+                    self.result = True
+                    return True
+                if not steps & 0x3ff:
+                    if self.cancelled or (deadline is not None
+                                          and time.perf_counter() > deadline):
+                        return None
+                if limit is not None and steps >= limit:
+                    return None
+                row, col, box = cells[depth]
+                avail = ~(rows[row] | cols[col] | boxes[box]) & full
+                if not avail:
+                    self.backtracks += 1
+                    if depth > self.max_depth:
+                        self.max_depth = depth
+                    while not avail:
+                        if not stack:
+                            self.result = False
+                            return False
+                        avail = stack.pop()
+                        row, col, box = cells[len(stack)]
+                        bit = ~(1 << (board[row][col] - 1))
+                        board[row][col] = 0
+                        rows[row] &= bit
+                        cols[col] &= bit
+                        boxes[box] &= bit
+                bit = avail & -avail
+                stack.append(avail ^ bit)
+                board[row][col] = bit.bit_length()
+                rows[row] |= bit
+                cols[col] |= bit
+                boxes[box] |= bit
+                steps += 1
+        finally:
+            self.steps = steps
+
+
+def generate_puzzle(size: int = 9,
+                    removed: int = 0,
+                    *,
+                    max_steps: Optional[int] = None,
+                    timeout: Optional[float] = None,
+                    unique: bool = False,
+                    seed: Optional[int] = None,
+                    rating: Optional[tuple[float, float]] = None,
+                    attempts: int = 100,
+                    stats: Optional[GenerationStats] = None
+                    ) -> tuple[list[list[int]], list[list[int]]]:
+    """Given a number of rows and number of cells to remove, this function:
     1. creates a SudokuGenerator
     2. fills its values and saves this as the solved state
     3. removes the appropriate number of cells
     4. returns the representative 2D Python Lists of the board and solution
 
+    9x9 boards are filled like `fill_values`, with a `FillSearch`. Other
+    boards, or calls with a budget, are filled with
+    `SudokuGenerator.fill_values_mrv` instead (the fixed diagonal pre-fill
+    cannot always be completed on 4x4).
+
     ### Parameters:
     - `size` is the number of rows/columns of the board (9 for this project)
     - `removed` is the number of cells to clear (set to 0)
+    - `max_steps` and `timeout` bound the search (see `fill_values_mrv`)
+    - `unique` only removes cells while the puzzle keeps exactly one
+    solution (see `SudokuGenerator.remove_cells_unique`), so fewer
+    than `removed` cells may end up cleared
+    - `seed` regenerates the same board for the same arguments
+    - `rating` is a (low, high) band of `rating.rate` scores: puzzles
+    are generated until one scores within it, at most `attempts` times
+    - `stats` collects counters and phase timings of the generation
+    (and of every attempt when targeting a `rating`), then is flushed
+    to its log; leaving it `None` adds no overhead
 
     ### Return:
-    - `list[list[Cell]]` (a 2D Python list to represent the board)
+    - `tuple[list[list[int]], list[list[int]]]` (the board and its solution)
+
+    ### Raises:
+    - `TimeoutError` if the budget ran out before a solution was found
+    - `RuntimeError` if no puzzle within `attempts` scored in `rating`
     """
-    sudoku = SudokuGenerator(size, removed)
-    sudoku.fill_values()
-    sudoku.remove_cells()
+    if stats is not None:
+        stats.context.update(size=size, removed=removed, unique=unique,
+                             seed=seed, rating=rating)
+    try:
+        if rating is None:
+            return _generate(size, removed, max_steps, timeout, unique, seed,
+                             stats)
+        from rating import rate  # imported here since rating imports this module
+        low, high = rating
+        seeds = random.Random(seed)
+        for _ in range(attempts):
+            board, solution = _generate(size, removed, max_steps, timeout,
+                                        unique, seeds.getrandbits(64), stats)
+            if low <= rate(board).score <= high:
+                return board, solution
+        raise RuntimeError(f'No puzzle scored within {rating} in {attempts} attempts.')
+    finally:
+        if stats is not None:
+            stats.flush()
+
+
+def _generate(size: int, removed: int, max_steps: Optional[int],
+              timeout: Optional[float], unique: bool, seed: Optional[int],
+              stats: Optional[GenerationStats] = None
+              ) -> tuple[list[list[int]], list[list[int]]]:
+    """Generates one puzzle for `generate_puzzle`."""
+    sudoku = SudokuGenerator(size, removed, seed)
+    if stats is not None:
+        sudoku.instrument(stats)
+        phase = stats.phase
+    else:
+        phase = lambda _: contextlib.nullcontext()
+    with phase('fill'):
+        if size != 9 or max_steps is not None or timeout is not None:
+            report = sudoku.fill_values_mrv(max_steps, timeout)
+            if stats is not None:
+                stats.restarts += report.restarts
+            if not report.solved:
+                raise TimeoutError(f'Generation budget exhausted: {report}')
+        else:
+            sudoku.fill_diagonal()
+            search = FillSearch(sudoku)
+            search.run()
+            if stats is not None:
+                stats.nodes += search.steps
+                # every placement, and every dead end, follows one
+                # candidate mask check
+                stats.validity_checks += search.steps + search.backtracks
+                stats.backtracks += search.backtracks
+                stats.max_depth = max(stats.max_depth, search.max_depth)
+    solution = [row.copy() for row in sudoku.get_board()]
+    with phase('remove'):
+        if unique:
+            sudoku.remove_cells_unique()
+        else:
+            sudoku.remove_cells()
     board = sudoku.get_board()
-    return board
+    return board, solution
+
+
+def generate_sudoku(size: int = 9,
+                    removed: int = 0,
+                    **options) -> list[list[int]]:
+    """Generates a board with `removed` cells cleared.
+    Takes the same keyword options as `generate_puzzle`.
+
+    ### Parameters:
+    - `size` is the number of rows/columns of the board (9 for this project)
+    - `removed` is the number of cells to clear (set to 0)
+
+    ### Return:
+    - `list[list[Cell]]` (a 2D Python list to represent the board)
+    """
+    return generate_puzzle(size, removed, **options)[0]
+
+
+def _generate_chunk(seeds: list[int], size: int, removed: int, unique: bool,
+                    stats_log: Optional[str]) -> list[tuple[int, list[list[int]]]]:
+    """Process pool task for `generate_batch`."""
+    return [(seed, generate_sudoku(
+                size, removed, unique=unique, seed=seed,
+                stats=None if stats_log is None else GenerationStats(stats_log)))
+            for seed in seeds]
+
+
+def pool_map(func: Callable, chunks: Iterable, *args: Any,
+             workers: Optional[int] = None,
+             ordered: bool = True) -> Iterator[tuple[Any, Any]]:
+    """Runs `func(chunk, *args)` for every chunk across a process pool,
+    yielding `(chunk, result)` pairs. At most two chunks per worker are
+    in flight, so `chunks` is read lazily and memory stays bounded
+    however many there are.
+
+    ### Parameters:
+    - `func` must be picklable (a module-level function)
+    - `workers` is the number of processes (all cores if `None`)
+    - `ordered` yields the pairs in the order of `chunks`; otherwise each
+    is yielded as soon as it finishes, so a slow chunk holds nothing back
+    """
+    # imported here since it is the bulk of this module's import time
+    from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+    workers = workers or os.cpu_count() or 1
+
+    def ready() -> Iterable:
+        if ordered:
+            return (next(iter(pending)),)
+        return wait(pending, return_when=FIRST_COMPLETED).done
+
+    with ProcessPoolExecutor(workers) as pool:
+        # the chunk of every future, in the order they were submitted
+        pending = {}
+        for chunk in chunks:
+            pending[pool.submit(func, chunk, *args)] = chunk
+            if len(pending) >= 2 * workers:
+                for future in ready():
+                    yield pending.pop(future), future.result()
+        while pending:
+            for future in ready():
+                yield pending.pop(future), future.result()
+
+
+def generate_batch(n: int,
+                   size: int = 9,
+                   removed: int = 0,
+                   seed: Optional[int] = None,
+                   workers: Optional[int] = None,
+                   *,
+                   unique: bool = False,
+                   chunk_size: int = 64,
+                   stats_log: Optional[str] = None
+                   ) -> Iterator[tuple[int, list[list[int]]]]:
+    """Generates `n` puzzles across a process pool (see `pool_map`),
+    yielding each `(puzzle_seed, board)` pair as soon as its chunk
+    finishes (so not in seed order). Every board can be regenerated on
+    its own with
+    `generate_sudoku(size, removed, unique=unique, seed=puzzle_seed)`.
+
+    ### Parameters:
+    - `n` is the number of puzzles to generate
+    - `size`, `removed` and `unique` are passed on to `generate_sudoku`
+    - `seed` derives the per-puzzle seeds (random if `None`)
+    - `workers` is the number of processes (all cores if `None`)
+    - `chunk_size` is the number of puzzles per pool task
+    - `stats_log` is a JSON-lines file that the `GenerationStats` of
+    every puzzle is appended to (nothing is collected if `None`)
+    """
+    master = random.Random(seed)
+    seeds = (master.getrandbits(64) for _ in range(n))
+    chunks = iter(lambda: list(itertools.islice(seeds, chunk_size)), [])
+    for _, boards in pool_map(_generate_chunk, chunks, size, removed, unique,
+                              stats_log, workers=workers, ordered=False):
+        yield from boards
 
 
 def main() -> None:
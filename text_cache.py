@@ -0,0 +1,64 @@
+import pygame
+from collections import OrderedDict
+from typing import Optional
+
+Color = tuple[int, int, int]
+
+
+class TextCache:
+    def __init__(self, capacity: int = 512) -> None:
+        """A bounded LRU cache of rendered text surfaces, keyed by
+        (font, text, color, background).
+
+        ### Parameters:
+        - `capacity` is the number of surfaces kept before the least
+        recently used one is evicted
+        """
+        self.capacity = capacity
+        self.surfaces: OrderedDict[tuple, pygame.Surface] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def render(self, font: pygame.font.Font, text: str, color: Color,
+               background: Optional[Color] = None) -> pygame.Surface:
+        """Returns `font.render(text, True, color, background)`,
+        rasterizing it only if it is not already cached.
+        The returned surface is shared, so it must not be drawn on.
+        """
+        key = (font, text, color, background)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+        self.misses += 1
+        surface = font.render(text, True, color, background)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.capacity:
+            self.surfaces.popitem(last=False)
+            self.evictions += 1
+        return surface
+
+    def stats(self) -> dict[str, int]:
+        """Returns the cache counters and current size."""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': len(self.surfaces),
+        }
+
+    def clear(self) -> None:
+        """Drops every cached surface and resets the counters."""
+        self.surfaces.clear()
+        self.hits = self.misses = self.evictions = 0
+
+
+TEXT_CACHE = TextCache()
+
+
+def render_text(font: pygame.font.Font, text: str, color: Color,
+                background: Optional[Color] = None) -> pygame.Surface:
+    """Renders text through the shared `TEXT_CACHE`."""
+    return TEXT_CACHE.render(font, text, color, background)
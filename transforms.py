@@ -0,0 +1,740 @@
+import hashlib
+import itertools
+import math
+import random
+import sys
+from operator import itemgetter
+from typing import Iterable, Iterator, NamedTuple, Optional
+
+import puzzle_format
+from sudoku_generator import flatten, generate_puzzle
+
+"""
+Turns one generated puzzle into many by the symmetries of Sudoku.
+
+Relabeling the digits, permuting the rows within a band (and the columns
+within a stack), permuting the bands (and the stacks) and transposing all
+map a valid grid to a valid grid, so applying the same `Transform` to a
+puzzle and its solution gives another puzzle with exactly that solution:
+a unique puzzle stays unique and keeps its difficulty. A 9x9 grid has
+2 * 6^8 * 9! (about 1.2e12) such images, each costing a few table lookups
+instead of a fill and a carve. `canonical` picks one representative
+of all the images of a grid, so that duplicates can be recognized.
+"""
+
+Grid = list[list[int]]
+
+
+class Transform(NamedTuple):
+    digits: tuple[int, ...]  # the new value of every value (0 stays 0)
+    rows: tuple[int, ...]  # the old row that every new row is taken from
+    cols: tuple[int, ...]  # the old column that every new column is taken from
+    transpose: bool  # whether rows and columns are swapped last
+
+    def apply(self, grid: Grid) -> Grid:
+        """Returns the image of `grid` (which is not modified)."""
+        n = len(grid)
+        table = bytes(self.digits) + bytes(256 - len(self.digits))
+        values = bytes(flatten(grid)).translate(table)
+        pick = itemgetter(*self.cols)
+        image = [list(pick(values[r*n:r*n + n])) for r in self.rows]
+        if self.transpose:
+            image = [list(col) for col in zip(*image)]
+        return image
+
+
+def identity(n: int) -> Transform:
+    """Returns the transform of an n by n board that changes nothing."""
+    return Transform(tuple(range(n + 1)), tuple(range(n)), tuple(range(n)), False)
+
+
+def random_transform(n: int, rng: Optional[random.Random] = None) -> Transform:
+    """Returns a uniformly random symmetry of an n by n board,
+    drawn from `rng` (a fresh `random.Random` if `None`).
+    """
+    if rng is None:
+        rng = random.Random()
+    k = int(math.sqrt(n))
+
+    def lines() -> tuple[int, ...]:
+        return tuple(band*k + i for band in rng.sample(range(k), k)
+                                for i in rng.sample(range(k), k))
+
+    return Transform((0, *rng.sample(range(1, n + 1), n)), lines(), lines(),
+                     rng.random() < 0.5)
+
+
+def variants(puzzle: Grid, solution: Grid,
+             seed: Optional[int] = None) -> Iterator[tuple[Grid, Grid]]:
+    """Endlessly yields random images of a puzzle/solution pair."""
+    rng = random.Random(seed)
+    n = len(puzzle)
+    while True:
+        transform = random_transform(n, rng)
+        yield transform.apply(puzzle), transform.apply(solution)
+
+
+def generate_variants(count: Optional[int] = None,
+                      size: int = 9,
+                      removed: int = 0,
+                      seed: Optional[int] = None,
+                      *,
+                      per_seed: int = 64,
+                      unique: bool = False) -> Iterator[tuple[Grid, Grid]]:
+    """Yields `count` (endless if `None`) puzzle/solution pairs, generating
+    one puzzle with `generate_puzzle` per `per_seed` pairs and deriving
+    the others from it by symmetry.
+
+    ### Parameters:
+    - `size`, `removed` and `unique` are passed on to `generate_puzzle`
+    - `seed` makes the sequence reproducible
+    - `per_seed` is the number of images taken from every generated
+    puzzle (1 generates every puzzle)
+    """
+    master = random.Random(seed)
+    produced = 0
+    while count is None or produced < count:
+        puzzle, solution = generate_puzzle(size, removed, unique=unique,
+                                           seed=master.getrandbits(64))
+        batch = per_seed if count is None else min(per_seed, count - produced)
+        yield from itertools.islice(
+            variants(puzzle, solution, master.getrandbits(64)), batch)
+        produced += batch
+
+
+# one entry of the column order being refined by `canonical`: stacks that
+# are still interchangeable (blank in every row so far, with columns of the
+# same signatures), each with its columns in order, in blocks of columns
+# that are still interchangeable (blank so far, with the same signature)
+Columns = tuple[tuple[int, ...], tuple[tuple[tuple[int, ...], ...], ...]]
+# how a row splits a block of columns: (blank, labeled by label, new digits)
+Split = tuple[list[int], list[int], list[int]]
+# a part of a row: whether its entries can be reordered, and the entries:
+# (stacks, their blocks if left as they were, the splits of their blocks
+# otherwise)
+Part = tuple[bool, list[tuple[tuple[int, ...],
+                              Optional[tuple[tuple[tuple[int, ...], ...], ...]],
+                              Optional[list[Split]]]]]
+
+
+def _map_signature(image: list[int], k: int) -> tuple[tuple[int, int, int], ...]:
+    """Returns the shape of a partial one-to-one map of the columns
+    (`image[c]` is where column c goes, -1 if nowhere): the length of
+    each of its paths and cycles, and how many of their steps leave
+    their stack, sorted.
+    """
+    n = len(image)
+    reached = [False] * n
+    for c in image:
+        if c >= 0:
+            reached[c] = True
+    seen = [False] * n
+    shape = []
+    for start in range(n):
+        if reached[start]:
+            continue
+        c = start
+        length = crossings = 0
+        seen[c] = True
+        while image[c] >= 0:
+            crossings += c // k != image[c] // k
+            c = image[c]
+            seen[c] = True
+            length += 1
+        shape.append((length, 0, crossings))
+    for start in range(n):
+        if seen[start]:
+            continue
+        c = start
+        length = crossings = 0
+        while not seen[c]:
+            seen[c] = True
+            crossings += c // k != image[c] // k
+            c = image[c]
+            length += 1
+        shape.append((length, 1, crossings))
+    return tuple(sorted(shape))
+
+
+def _line_ranks(lines: tuple[tuple[int, ...], ...], k: int) -> list[int]:
+    """Ranks the lines (rows, or columns when given the transpose) by a
+    signature that every `Transform` carries along with the line: its
+    blank count, and for every other line, whether it is in the same
+    band and the `_map_signature` of where the digits of the line sit
+    in it. Lines of the same rank are told apart by the search.
+    """
+    n = len(lines)
+    where = []
+    for line in lines:
+        place = [-1] * (n + 1)
+        for c, val in enumerate(line):
+            if val:
+                place[val] = c
+        where.append(place)
+    signatures = []
+    for r, line in enumerate(lines):
+        pairs = sorted(
+            (r // k == s // k, _map_signature([where[s][val] if val else -1
+                                               for val in line], k))
+            for s in range(n) if s != r)
+        signatures.append((line.count(0), tuple(pairs)))
+    rank = {signature: i for i, signature in enumerate(sorted(set(signatures)))}
+    return [rank[signature] for signature in signatures]
+
+
+def _line_order(ranks: list[int], k: int) -> tuple[list[int], list[tuple[int, ...]]]:
+    """Returns the smallest sequence of ranks that lines can be put in
+    (ascending within bands, bands by their sorted ranks), and the bands
+    in that order, grouped into tuples of interchangeable bands.
+    """
+    n = len(ranks)
+    bands = sorted((tuple(sorted(ranks[b*k:b*k + k])), b) for b in range(n // k))
+    order = [r for key, _ in bands for r in key]
+    groups = [tuple(b for _, b in group)
+              for _, group in itertools.groupby(bands, key=itemgetter(0))]
+    return order, groups
+
+
+def _split(row: tuple[int, ...], cols: Iterable[int], labels: list[int]) -> Split:
+    """Splits `cols` into the blank ones, the ones holding a labeled digit
+    (by label) and the ones holding a digit first seen in `row`.
+    """
+    blank, known, new = [], [], []
+    for j in cols:
+        val = row[j]
+        if not val:
+            blank.append(j)
+        elif labels[val]:
+            known.append(j)
+        else:
+            new.append(j)
+    known.sort(key=lambda j: labels[row[j]])
+    return blank, known, new
+
+
+def _emit(out: list[int], splits: list[Split], row: tuple[int, ...],
+          labels: list[int], fresh: int) -> int:
+    """Appends the relabeled values of `splits` to `out`.
+    Returns the next label.
+    """
+    for blank, known, new in splits:
+        out.extend(0 for _ in blank)
+        out.extend(labels[row[j]] for j in known)
+        out.extend(range(fresh, fresh + len(new)))
+        fresh += len(new)
+    return fresh
+
+
+def _search_error() -> RuntimeError:
+    return RuntimeError('The canonical form search is over budget '
+                        '(the grid has too many symmetries).')
+
+
+def _refine(row: tuple[int, ...], columns: tuple[Columns, ...],
+            labels: list[int], fresh: int) -> tuple[tuple[int, ...], list[Part]]:
+    """Orders `row` as the next row of the image, as small as the column
+    order refined so far allows: within each block, blanks first, then
+    labeled digits by label, then new digits, which take the next labels.
+
+    ### Return:
+    - `tuple[tuple[int, ...], list[Part]]` (the relabeled row, and its
+    parts, whose orderings all give that same row; they only differ in
+    the labels the new digits get, see `_Search.order`)
+    """
+    out = []
+    parts = []
+    for stacks, blocks in columns:
+        if len(stacks) == 1:
+            splits = [_split(row, block, labels) for block in blocks[0]]
+            fresh = _emit(out, splits, row, labels, fresh)
+            parts.append((False, [(stacks, None, splits)]))
+            continue
+        keyed = []
+        for stack, stack_blocks in zip(stacks, blocks):
+            splits = [_split(row, block, labels) for block in stack_blocks]
+            key = []
+            for blank, known, new in splits:
+                key.extend(0 for _ in blank)
+                key.extend(labels[row[j]] for j in known)
+                key.extend(len(labels) for _ in new)
+            keyed.append((tuple(key), stack, stack_blocks, splits))
+        keyed.sort(key=itemgetter(0))
+        for key, group in itertools.groupby(keyed, key=itemgetter(0)):
+            group = list(group)
+            if not any(key):
+                # blank stacks stay interchangeable
+                out.extend(key * len(group))
+                parts.append((False, [(tuple(g[1] for g in group),
+                                       tuple(g[2] for g in group), None)]))
+                continue
+            for *_, splits in group:
+                fresh = _emit(out, splits, row, labels, fresh)
+            parts.append((True, [((stack,), None, splits)
+                                 for _, stack, _, splits in group]))
+    return tuple(out), parts
+
+
+# a choice made by the search of `canonical`: ('o', orientation),
+# ('r', row), ('s', stack) or ('c', column), the line put next
+Choice = tuple[str, int]
+
+
+class _Search:
+    def __init__(self, n: int, k: int, digits: set[int], max_states: int) -> None:
+        """The depth-first search of `canonical`. Rows are placed one at
+        a time, each followed by the choices ordering the stacks and
+        columns it tells apart, one line per choice.
+
+        Whenever a leaf gives the same image as the best one, the two
+        orders together are a symmetry of the grid: the choices it maps
+        onto each other lead to the same images, so only one of them is
+        followed, and the search backs up to where the two leaves split.
+
+        ### Parameters:
+        - `digits` are the digits in the grid
+        - `max_states` bounds the nodes the search may visit
+        """
+        self.n = n
+        self.k = k
+        self.digits = digits
+        self.left = max_states
+        self.best: Optional[list[tuple[int, ...]]] = None
+        # the choices, orientation, rows and columns of the first leaf
+        # found with every image
+        self.leaves: dict[tuple[tuple[int, ...], ...],
+                          tuple[tuple[Choice, ...], int, tuple[int, ...], list[int]]] = {}
+        # (orientation, row map, column map) of every symmetry found
+        self.symmetries: list[tuple[int, list[int], list[int]]] = []
+
+    def visit(self) -> None:
+        self.left -= 1
+        if self.left < 0:
+            raise _search_error()
+
+    def moves(self, choice: Choice, symmetry: tuple[int, list[int], list[int]]) -> int:
+        """Returns where `symmetry` takes the line of `choice`."""
+        _, rows, cols = symmetry
+        kind, line = choice
+        if kind == 'r':
+            return rows[line]
+        if kind == 'c':
+            return cols[line]
+        if kind == 's':
+            return cols[line * self.k] // self.k
+        return line
+
+    def covered(self, choice: Choice, followed: list[Choice],
+                orientation: int, path: tuple[Choice, ...]) -> bool:
+        """Returns whether a symmetry that keeps every choice of `path`
+        takes `choice` to one of the choices already `followed`.
+        """
+        if not followed:
+            return False
+        fixing = [symmetry for symmetry in self.symmetries
+                  if symmetry[0] == orientation
+                  and all(self.moves(step, symmetry) == step[1] for step in path)]
+        kind = choice[0]
+        orbit = {choice[1]}
+        frontier = [choice[1]]
+        while frontier:
+            line = frontier.pop()
+            for symmetry in fixing:
+                image = self.moves((kind, line), symmetry)
+                if image not in orbit:
+                    orbit.add(image)
+                    frontier.append(image)
+        return any(line in orbit for _, line in followed)
+
+    def place(self, view: tuple, placed: tuple[int, ...], columns: tuple[Columns, ...],
+              labels: list[int], fresh: int, image: list[tuple[int, ...]],
+              path: tuple[Choice, ...]) -> Optional[int]:
+        """Places the next row of the image, trying every row that makes
+        it smallest.
+
+        ### Return:
+        - `Optional[int]` (the number of choices to back up to, if a
+        symmetry showed the rest of this subtree to be a copy of one
+        already searched)
+        """
+        self.visit()
+        orientation, lines, _, _ = view
+        n, k = self.n, self.k
+        r = len(placed)
+        if r == n:
+            return self.leaf(orientation, placed, columns, image, path)
+        if all(len(stacks) == 1 and all(len(block) == 1 for block in blocks[0])
+               for stacks, blocks in columns)\
+                and all(labels[val] for val in self.digits):
+            return self.complete(view, placed, columns, labels, image, path)
+        refined = {}
+        blank = set()
+        for i in self.options(view, placed):
+            if not any(lines[i]):
+                # blank rows of a band are interchangeable
+                if i // k in blank:
+                    continue
+                blank.add(i // k)
+            refined[i] = _refine(lines[i], columns, labels, fresh)
+        smallest = min(out for out, _ in refined.values())
+        image = image + [smallest]
+        followed = []
+        for i, (out, parts) in refined.items():
+            if out != smallest:
+                continue
+            if self.best is not None and image > self.best[:r + 1]:
+                return None
+            choice = ('r', i)
+            if self.covered(choice, followed, orientation, path):
+                continue
+            followed.append(choice)
+            agenda = tuple(('order', entries) if reorderable else ('entry', entries[0])
+                           for reorderable, entries in parts)
+            back = self.order(view, placed + (i,), agenda, (), (), labels, fresh,
+                              image, path + (choice,))
+            if back is not None and back < len(path):
+                return back
+        return None
+
+    def order(self, view: tuple, placed: tuple[int, ...], agenda: tuple,
+              columns: tuple[Columns, ...], current: tuple[tuple[int, ...], ...],
+              labels: list[int], fresh: int, image: list[tuple[int, ...]],
+              path: tuple[Choice, ...]) -> Optional[int]:
+        """Orders the columns of the row just placed as `agenda` says,
+        then places the next row (see `place`). `current` holds the
+        blocks of the stack being ordered.
+        """
+        row = view[1][placed[-1]]
+        while agenda:
+            (kind, item), agenda = agenda[0], agenda[1:]
+            if kind == 'entry':
+                stacks, blocks, splits = item
+                if splits is None:
+                    columns += ((stacks, blocks),)
+                    continue
+                steps = []
+                for blank, known, new in splits:
+                    steps.append(('split', (blank, known)))
+                    steps.append(('new', tuple(new)))
+                steps.append(('close', stacks))
+                agenda = tuple(steps) + agenda
+            elif kind == 'split':
+                blank, known = item
+                if blank:
+                    current += (tuple(blank),)
+                current += tuple((j,) for j in known)
+            elif kind == 'close':
+                columns += ((item, (current,)),)
+                current = ()
+            elif len(item) == 1:
+                if kind == 'order':
+                    agenda = (('entry', item[0]),) + agenda
+                    continue
+                labels = labels.copy()
+                labels[row[item[0]]] = fresh
+                fresh += 1
+                current += (item,)
+            elif item:
+                return self.choose(view, placed, kind, item, agenda, columns,
+                                   current, labels, fresh, image, path)
+        return self.place(view, placed, columns, labels, fresh, image, path)
+
+    def choose(self, view: tuple, placed: tuple[int, ...], kind: str, item: tuple,
+               agenda: tuple, columns: tuple[Columns, ...],
+               current: tuple[tuple[int, ...], ...], labels: list[int], fresh: int,
+               image: list[tuple[int, ...]], path: tuple[Choice, ...]) -> Optional[int]:
+        """Tries every stack of a tied group (`kind` 'order'), or every
+        column holding a new digit (`kind` 'new'), as the next one.
+        """
+        self.visit()
+        row = view[1][placed[-1]]
+        followed = []
+        for idx, first in enumerate(item):
+            rest = item[:idx] + item[idx + 1:]
+            if kind == 'order':
+                choice = ('s', first[0][0])
+                steps = (('entry', first), ('order', rest))
+                assigned, more, after = labels, current, fresh
+            else:
+                choice = ('c', first)
+                steps = (('new', rest),)
+                assigned = labels.copy()
+                assigned[row[first]] = fresh
+                more, after = current + ((first,),), fresh + 1
+            if self.covered(choice, followed, view[0], path)\
+                    or self.hopeless(view, placed, steps + agenda, columns, more,
+                                     assigned, after, image):
+                continue
+            followed.append(choice)
+            back = self.order(view, placed, steps + agenda, columns, more,
+                              assigned, after, image, path + (choice,))
+            if back is not None and back < len(path):
+                return back
+        return None
+
+    def complete(self, view: tuple, placed: tuple[int, ...],
+                 columns: tuple[Columns, ...], labels: list[int],
+                 image: list[tuple[int, ...]], path: tuple[Choice, ...]) -> Optional[int]:
+        """Places the remaining rows at once, once every column is in
+        place and every digit labeled, so that each row has a fixed image:
+        the band being placed in ascending order, then the other bands,
+        in ascending order inside and by their rows between them.
+        """
+        _, lines, ranks, order = view
+        n, k = self.n, self.k
+        pick = itemgetter(*(j for _, blocks in columns for (j,) in blocks[0]))
+
+        def band(rows: Iterable[int]) -> list[tuple[int, tuple[int, ...], int]]:
+            return sorted((ranks[i], tuple(labels[val] for val in pick(lines[i])), i)
+                          for i in rows)
+
+        rows = list(placed)
+        image = list(image)
+        if len(placed) % k:
+            start = placed[-1] // k * k
+            for _, out, i in band(i for i in range(start, start + k) if i not in placed):
+                rows.append(i)
+                image.append(out)
+        used = {i // k for i in placed}
+        bands = sorted((tuple(rank for rank, _, _ in rest), [out for _, out, _ in rest],
+                        [i for *_, i in rest])
+                       for rest in (band(range(b*k, b*k + k))
+                                    for b in range(n // k) if b not in used))
+        for _, outs, band_rows in bands:
+            image.extend(outs)
+            rows.extend(band_rows)
+        return self.leaf(view[0], tuple(rows), columns, image, path)
+
+    def options(self, view: tuple, placed: tuple[int, ...]) -> list[int]:
+        """Returns the rows that can be placed next: the rest of the band
+        being placed, or the rows of the bands with the next ranks.
+        """
+        _, _, ranks, order = view
+        n, k = self.n, self.k
+        r = len(placed)
+        if r % k:
+            band = placed[-1] // k
+            rows = (i for i in range(band*k, band*k + k) if i not in placed)
+        else:
+            used = {i // k for i in placed}
+            rows = (i for b in range(n // k) if b not in used
+                    and sorted(ranks[b*k:b*k + k]) == order[r:r + k]
+                    for i in range(b*k, b*k + k))
+        return [i for i in rows if ranks[i] == order[r]]
+
+    def hopeless(self, view: tuple, placed: tuple[int, ...], agenda: tuple,
+                 columns: tuple[Columns, ...], current: tuple[tuple[int, ...], ...],
+                 labels: list[int], fresh: int, image: list[tuple[int, ...]]) -> bool:
+        """Returns whether every row that can come next is, in the columns
+        ordered so far, larger than the next row of the best image,
+        although the image matches it up to here. `agenda` is what is
+        left to order of the row being placed (see `order`).
+        """
+        r = len(placed)
+        if self.best is None or r == self.n or image != self.best[:r]:
+            return False
+        lines = view[1]
+        known = []
+        for stacks, blocks in columns + (((None,), (current,)),):
+            if len(stacks) > 1:
+                break
+            for block in blocks[0]:
+                if len(block) > 1:
+                    break
+                known.append(block[0])
+            else:
+                continue
+            break
+        # the smallest label each new digit of the row being placed can get
+        row = lines[placed[-1]]
+        least = {}
+        fewest = fresh
+        for kind, item in agenda:
+            if kind == 'entry' and item[2] is not None:
+                for _, _, new in item[2]:
+                    for j in new:
+                        least[row[j]] = fewest
+                    fewest += len(new)
+            elif kind == 'new':
+                for j in item:
+                    least[row[j]] = fewest
+                fewest += len(item)
+            elif kind == 'order':
+                new = [j for *_, splits in item for _, _, cols in splits for j in cols]
+                for j in new:
+                    least[row[j]] = fewest
+                fewest += len(new)
+        target = self.best[r]
+        for i in self.options(view, placed):
+            line = lines[i]
+            # labels that new digits must take for the row to match
+            taken = set()
+            for j, want in zip(known, target):
+                val = line[j]
+                if val and not labels[val]:
+                    low = least.get(val, fewest)
+                    while low in taken:
+                        low += 1
+                    if low < want:
+                        return False
+                    if low > want:
+                        break
+                    taken.add(low)
+                    continue
+                val = labels[val] if val else 0
+                if val != want:
+                    if val < want:
+                        return False
+                    break
+            else:
+                return False
+        return True
+
+    def leaf(self, orientation: int, placed: tuple[int, ...],
+             columns: tuple[Columns, ...], image: list[tuple[int, ...]],
+             path: tuple[Choice, ...]) -> Optional[int]:
+        cols = [j for _, blocks in columns for stack in blocks
+                for block in stack for j in block]
+        if self.best is None or image < self.best:
+            self.best = image
+        key = tuple(image)
+        seen = self.leaves.get(key)
+        if seen is None:
+            self.leaves[key] = (path, orientation, placed, cols)
+            return None
+        seen_path, seen_orientation, seen_rows, seen_cols = seen
+        if seen_orientation == orientation:
+            rows = list(range(self.n))
+            cols_map = list(range(self.n))
+            for a, b in zip(seen_rows, placed):
+                rows[a] = b
+            for a, b in zip(seen_cols, cols):
+                cols_map[a] = b
+            self.symmetries.append((orientation, rows, cols_map))
+        # the subtree below the split maps onto the one holding that leaf
+        split = 0
+        while path[split:split + 1] == seen_path[split:split + 1]:
+            split += 1
+        return split
+
+def canonical(grid: Grid, max_states: int = 50_000) -> Grid:
+    """Returns the canonical form of `grid`: its smallest image under
+    every `Transform`, in an order that compares the ranks of the rows
+    (see `_line_ranks`) first, then those of the columns, then the values
+    row by row. Two grids are images of each other exactly when their
+    canonical forms are equal.
+
+    The ranks fix the order of most rows and columns up front. The rest
+    is searched (see `_Search`) only along the choices that give the
+    smallest image so far, ordering columns tied by rank once a row tells
+    them apart, and skipping choices that symmetries of the grid found
+    on the way show to be copies. The digits of the image appear in
+    increasing order, and 0 is the smallest value. Puzzles take a few
+    milliseconds at 9x9 and about 20 ms at 16x16, solved or not; the most
+    symmetric grids (see `pattern_grid`) take up to a second or two.
+
+    ### Parameters:
+    - `max_states` bounds the nodes the search may visit
+
+    ### Raises:
+    - `RuntimeError` if the search needs more than `max_states` nodes
+    (only grids with a great many symmetries, such as the 25x25
+    `pattern_grid`, do)
+    """
+    n = len(grid)
+    k = int(math.sqrt(n))
+    values = list(flatten(grid))
+    rows = tuple(tuple(values[i*n:i*n + n]) for i in range(n))
+    cols = tuple(tuple(values[j::n]) for j in range(n))
+    row_ranks, col_ranks = _line_ranks(rows, k), _line_ranks(cols, k)
+    orientations = []
+    for lines, ranks, cross in ((rows, row_ranks, col_ranks),
+                                (cols, col_ranks, row_ranks)):
+        col_order, stacks = _line_order(cross, k)
+        orientations.append(((_line_order(ranks, k)[0], col_order), lines, ranks,
+                             cross, stacks))
+    smallest = min(key for key, *_ in orientations)
+    search = _Search(n, k, set(values) - {0}, max_states)
+    for orientation, (key, lines, ranks, cross, stacks) in enumerate(orientations):
+        if key != smallest:
+            continue
+        columns = []
+        for group in stacks:
+            columns.append((group, tuple(
+                tuple(tuple(j for j in range(s*k, s*k + k) if cross[j] == rank)
+                      for rank in sorted(set(cross[s*k:s*k + k])))
+                for s in group)))
+        search.place((orientation, lines, ranks, key[0]), (), tuple(columns),
+                     [0] * (n + 1), 1, [], (('o', orientation),))
+    return [list(row) for row in search.best]
+
+
+def fingerprint(grid: Grid) -> bytes:
+    """Returns a 16-byte hash of the canonical form of `grid`, equal
+    for grids that are images of each other.
+    """
+    return hashlib.blake2b(puzzle_format.pack(canonical(grid)),
+                           digest_size=16).digest()
+
+
+def brute_canonical(grid: Grid) -> Grid:
+    """Returns the canonical form of `grid` by trying every `Transform`,
+    to check `canonical` against (only feasible up to 4x4: a 9x9 grid
+    has 2 * 6^8 orders of its lines).
+    """
+    n = len(grid)
+    k = int(math.sqrt(n))
+    lines = [tuple(band*k + i for band, inner in zip(bands, within) for i in inner)
+             for bands in itertools.permutations(range(k))
+             for within in itertools.product(itertools.permutations(range(k)), repeat=k)]
+    best = None
+    for transpose in (False, True):
+        for rows in lines:
+            for cols in lines:
+                image = Transform(tuple(range(n + 1)), rows, cols, transpose).apply(grid)
+                labels = {0: 0}
+                image = [[labels.setdefault(val, len(labels)) for val in row]
+                         for row in image]
+                key = (_line_ranks(tuple(map(tuple, image)), k),
+                       _line_ranks(tuple(zip(*image)), k), image)
+                if best is None or key < best:
+                    best = key
+    return best[2]
+
+
+def pattern_grid(n: int) -> Grid:
+    """Returns the solved n by n grid whose rows are shifts of 1..n,
+    one of the grids with the most symmetries.
+    """
+    k = int(math.sqrt(n))
+    return [[(k*(r % k) + r//k + c) % n + 1 for c in range(n)] for r in range(n)]
+
+
+def main() -> None:
+    """Usage: `python3 transforms.py [COUNT] [SEED]`
+    Checks `canonical` against `brute_canonical` on COUNT random 4x4
+    puzzles and the 4x4 `pattern_grid` (and a random image of each), and
+    that random images of the 9x9 and 16x16 pattern grids get the same
+    canonical form, exiting with status 1 on a mismatch.
+    """
+    count, seed = (list(map(int, sys.argv[1:])) + [200, 0][len(sys.argv) - 1:])[:2]
+    rng = random.Random(seed)
+    puzzles = [generate_puzzle(4, rng.randrange(17), seed=rng.getrandbits(64))[0]
+               for _ in range(count)]
+    for puzzle in puzzles + [pattern_grid(4)]:
+        expected = brute_canonical(puzzle)
+        for grid in (puzzle, random_transform(4, rng).apply(puzzle)):
+            if canonical(grid) != expected:
+                print(f'Mismatch on {grid}')
+                sys.exit(1)
+    for n in (9, 16):
+        expected = canonical(pattern_grid(n))
+        for _ in range(3):
+            grid = random_transform(n, rng).apply(pattern_grid(n))
+            if canonical(grid) != expected:
+                print(f'Mismatch on {grid}')
+                sys.exit(1)
+    print(f'canonical matches the brute force on {count + 1} puzzles '
+          f'and is the same for images of the pattern grids')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+import math
+import sys
+from typing import Any
+
+try:
+    import numpy as np
+except ImportError:  # numpy is only needed for `validate_batch`
+    np = None
+
+"""
+Checks whether filled boards are correct solutions.
+
+Every row, column and box of a solved n x n board holds each digit
+1..n exactly once. A unit is therefore correct exactly when its values
+are all in range and the OR of their one-hot masks `1 << (val - 1)`
+covers all n bits, since n values can only set n bits if they differ.
+"""
+
+
+def validate_batch(grids: Any) -> Any:
+    """Validates many boards at once.
+
+    ### Parameters:
+    - `grids` is an `(N, n, n)` integer array-like of filled boards
+
+    ### Return:
+    - `numpy.ndarray` (a boolean vector, True where the board is solved)
+
+    ### Raises:
+    - `ImportError` if numpy is not installed
+    - `ValueError` if `grids` is not a stack of square, perfect-square boards
+    """
+    if np is None:
+        raise ImportError('validate_batch requires numpy.')
+    grids = np.asarray(grids)
+    if grids.ndim != 3 or grids.shape[1] != grids.shape[2]\
+            or not math.sqrt(grids.shape[1]).is_integer():
+        raise ValueError('`grids` must have shape (N, n, n) with n a perfect square.')
+    count, n = grids.shape[0], grids.shape[1]
+    k = int(math.sqrt(n))
+    full = (1 << n) - 1
+
+    in_range = ((grids >= 1) & (grids <= n)).all(axis=(1, 2))
+    # out-of-range cells are replaced by 1 so the shift below stays defined
+    dtype = np.int32 if n < 31 else np.int64
+    safe = np.where((grids >= 1) & (grids <= n), grids, 1).astype(dtype)
+    bits = 1 << (safe - 1)
+    # (N, n, n) -> (N, box row, row in box, box col, col in box) -> boxes as rows
+    boxes = bits.reshape(count, k, k, k, k).transpose(0, 1, 3, 2, 4)\
+                .reshape(count, n, n)
+
+    rows_work = (np.bitwise_or.reduce(bits, axis=2) == full).all(axis=1)
+    cols_work = (np.bitwise_or.reduce(bits, axis=1) == full).all(axis=1)
+    boxes_work = (np.bitwise_or.reduce(boxes, axis=2) == full).all(axis=1)
+    return in_range & rows_work & cols_work & boxes_work
+
+
+def main() -> None:
+    """Usage: `python3 validator.py`
+    Checks `validate_batch` on solved, corrupted and out-of-range
+    boards and on an empty batch, exiting with status 1 on a failure.
+    """
+    from sudoku_generator import solve
+    failures = []
+    for size in (4, 9, 16):
+        solution = solve([[0] * size for _ in range(size)])
+        grids = np.array([solution] * 4)
+        grids[1, 0, 0] = grids[1, 0, 1]
+        grids[2, 0, 0] = 0
+        grids[3, 0, 0] = size + 1
+        if validate_batch(grids).tolist() != [True, False, False, False]:
+            failures.append(f'{size}x{size} boards')
+        if validate_batch(np.zeros((0, size, size), dtype=int)).shape != (0,):
+            failures.append(f'empty {size}x{size} batch')
+    for failure in failures:
+        print(f'FAILED {failure}')
+    if failures:
+        sys.exit(1)
+    print('validate_batch ok')
+
+
+if __name__ == '__main__':
+    main()